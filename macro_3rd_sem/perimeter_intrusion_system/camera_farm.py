@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Stand-in camera farm: many synthetic live MJPEG streams on localhost.
+
+Every camera renders walkers (the person shape of
+create_realistic_test_video.py) crossing its scene at its own resolution
+and frame rate, and serves them as HTTP multipart MJPEG, the same format
+cheap IP cameras and live_view.py use:
+
+    GET /                  one stream URL per line
+    GET /cam/<n>.mjpg      camera n
+
+A camera only renders while somebody is connected, and each frame is
+JPEG-encoded once for all of its clients. Per client connection the farm
+can add network jitter (a random delay before each frame), drop frames,
+and cut the connection after a random lifetime, halfway through a frame,
+like a camera reboot or a NAT timeout. After a cut the camera refuses
+connections (503) for --down-s seconds, to exercise reconnect back-off.
+
+    python camera_farm.py --cameras 60 --fps 10 --size 640x360 --walkers 3 \\
+        --jitter-ms 40 --drop 0.02 --disconnect-s 120 --down-s 5
+    python main.py --video http://127.0.0.1:8554/cam/7.mjpg --camera cam7 --headless
+
+--config farm.json overrides settings per camera, e.g.
+{"cam0": {"size": "1920x1080", "fps": 25}, "cam5": {"walkers": 20}}.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+import cv2
+import numpy as np
+from create_realistic_test_video import draw_background, draw_person
+
+BOUNDARY = b"frame"
+DEFAULTS = {
+    "size": "640x360",
+    "fps": 10.0,
+    "walkers": 3,          # people in the scene at a time
+    "jitter_ms": 0.0,      # mean extra delay per frame and client
+    "drop": 0.0,           # probability that a client misses a frame
+    "disconnect_s": 0.0,   # mean connection lifetime (0 = never cut)
+    "down_s": 0.0,         # refuse connections this long after a cut
+    "quality": 70,
+}
+SHIRTS = [(100, 150, 200), (150, 100, 100), (100, 200, 100), (60, 60, 160), (170, 170, 60)]
+SKINS = [(220, 180, 140), (200, 160, 120), (180, 140, 100), (120, 90, 70)]
+
+
+class FarmCamera:
+    def __init__(self, index, settings, seed=0):
+        self.index = index
+        self.name = f"cam{index}"
+        (self.width, self.height) = (int(v) for v in str(settings["size"]).lower().split("x"))
+        self.interval = 1.0 / float(settings["fps"])
+        self.walker_count = int(settings["walkers"])
+        self.jitter = float(settings["jitter_ms"]) / 1000.0
+        self.drop = float(settings["drop"])
+        self.disconnect_s = float(settings["disconnect_s"])
+        self.down_s = float(settings["down_s"])
+        self.quality = int(settings["quality"])
+        self.rng = random.Random(seed * 1000 + index)
+        self.background = draw_background(np.empty((self.height, self.width, 3), np.uint8),
+                                          spacing=max(20, self.width // 8))
+        self.walkers = []        # [x, y, vx, vy, scale, skin, shirt, legs]
+        self.jpeg = None
+        self.seq = 0
+        self.clients = 0
+        self.producer = None
+        self.encoded = None      # asyncio.Condition, created on the server loop
+        self.down_until = 0.0
+        # Counters for the periodic report
+        self.frames = 0
+        self.sent = 0
+        self.bytes = 0
+        self.drops = 0
+        self.cuts = 0
+        self.refused = 0
+        self.late = 0
+
+    def _spawn(self):
+        scale = self.height / 600.0 * self.rng.uniform(0.8, 1.2)
+        speed = self.rng.uniform(0.08, 0.25) * self.width   # crosses in 4-12 s
+        y = self.rng.uniform(0.05, 0.95 - 125 * scale / self.height) * self.height
+        if self.rng.random() < 0.5:
+            (x, vx) = (-40 * scale, speed)
+        else:
+            (x, vx) = (float(self.width), -speed)
+        self.walkers.append([x, y, vx, self.rng.uniform(-0.05, 0.05) * self.height, scale,
+                             self.rng.choice(SKINS), self.rng.choice(SHIRTS), (40, 40, 40)])
+
+    def step(self, dt):
+        for w in self.walkers:
+            w[0] += w[2] * dt
+            w[1] = min(max(w[1] + w[3] * dt, 0.0), self.height - 125 * w[4])
+        self.walkers = [w for w in self.walkers if -50 * w[4] <= w[0] <= self.width + 10]
+        while len(self.walkers) < self.walker_count:
+            self._spawn()
+
+    def render(self):
+        """Next frame as JPEG bytes (runs on an executor thread)."""
+        self.step(self.interval)
+        frame = self.background.copy()
+        for (x, y, _, _, scale, skin, shirt, legs) in self.walkers:
+            draw_person(frame, x, y, skin, shirt, legs, scale)
+        cv2.putText(frame, f"{self.name} #{self.seq + 1} {time.strftime('%H:%M:%S')}", (8, 20),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+        ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        return buf.tobytes() if ok else None
+
+
+class CameraFarm:
+    def __init__(self, cameras, host="127.0.0.1", port=8554):
+        self.cameras = cameras
+        self.host = host
+        self.port = port
+        self.loop = None
+
+    async def serve(self, report_interval=10.0):
+        self.loop = asyncio.get_running_loop()
+        for cam in self.cameras:
+            cam.encoded = asyncio.Condition()
+        server = await asyncio.start_server(self._handle, self.host, self.port, backlog=1024)
+        print(f"[INFO] {len(self.cameras)} cameras on http://{self.host}:{self.port}/cam/<n>.mjpg")
+        async with server:
+            while True:
+                await asyncio.sleep(report_interval)
+                print(f"[INFO] {self.report(report_interval)}")
+
+    def report(self, interval):
+        c = self.cameras
+        line = (f"clients {sum(x.clients for x in c)}, rendered {sum(x.frames for x in c) / interval:.0f} fps, "
+                f"sent {sum(x.sent for x in c) / interval:.0f} fps / "
+                f"{sum(x.bytes for x in c) / interval / 1e6:.1f} MB/s, dropped {sum(x.drops for x in c)}, "
+                f"cut {sum(x.cuts for x in c)}, refused {sum(x.refused for x in c)}, "
+                f"late renders {sum(x.late for x in c)}")
+        for x in c:
+            x.frames = x.sent = x.bytes = x.drops = x.cuts = x.refused = x.late = 0
+        return line
+
+    async def _produce(self, cam):
+        """Render at the camera's frame rate while it has clients."""
+        next_t = time.monotonic()
+        while cam.clients > 0:
+            jpeg = await self.loop.run_in_executor(None, cam.render)
+            cam.frames += 1
+            async with cam.encoded:
+                cam.jpeg = jpeg
+                cam.seq += 1
+                cam.encoded.notify_all()
+            next_t += cam.interval
+            delay = next_t - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                # The farm itself is out of CPU; keep the schedule instead of bursting
+                cam.late += 1
+                next_t = time.monotonic()
+        cam.producer = None
+
+    async def _handle(self, reader, writer):
+        try:
+            request = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            writer.close()
+            return
+        parts = request.decode("latin-1").split("\r\n")[0].split(" ")
+        path = parts[1].partition("?")[0] if len(parts) > 1 else "/"
+        try:
+            if path.startswith("/cam/") and path.endswith(".mjpg") and path[5:-5].isdigit() \
+                    and int(path[5:-5]) < len(self.cameras):
+                await self._serve_camera(self.cameras[int(path[5:-5])], writer)
+            elif path == "/":
+                urls = "".join(f"http://{self.host}:{self.port}/cam/{c.index}.mjpg\n" for c in self.cameras)
+                self._respond(writer, "200 OK", urls.encode())
+            else:
+                self._respond(writer, "404 Not Found", b"not found\n")
+            await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    def _respond(self, writer, status, body):
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Type: text/plain\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+
+    async def _serve_camera(self, cam, writer):
+        if time.monotonic() < cam.down_until:
+            cam.refused += 1
+            self._respond(writer, "503 Service Unavailable", b"camera restarting\n")
+            return
+        writer.write(b"HTTP/1.1 200 OK\r\nCache-Control: no-cache\r\nConnection: close\r\n"
+                     b"Content-Type: multipart/x-mixed-replace; boundary=" + BOUNDARY + b"\r\n\r\n")
+        rng = random.Random()
+        cut_at = time.monotonic() + rng.expovariate(1.0 / cam.disconnect_s) if cam.disconnect_s > 0 else math.inf
+        cam.clients += 1
+        if cam.producer is None:
+            cam.producer = self.loop.create_task(self._produce(cam))
+        try:
+            seq = cam.seq
+            while True:
+                async with cam.encoded:
+                    await cam.encoded.wait_for(lambda: cam.seq != seq)
+                    (jpeg, seq) = (cam.jpeg, cam.seq)
+                if jpeg is None:
+                    continue
+                if rng.random() < cam.drop:
+                    cam.drops += 1
+                    continue
+                if cam.jitter > 0:
+                    await asyncio.sleep(rng.expovariate(1.0 / cam.jitter))
+                part = (b"--" + BOUNDARY + b"\r\nContent-Type: image/jpeg\r\nContent-Length: "
+                        + str(len(jpeg)).encode() + b"\r\nX-Frame-Seq: " + str(seq).encode()
+                        + b"\r\nX-Timestamp: " + f"{time.time():.3f}".encode() + b"\r\n\r\n" + jpeg + b"\r\n")
+                if time.monotonic() >= cut_at:
+                    # Die mid-frame: the client sees a truncated JPEG and a reset connection
+                    writer.write(part[:len(part) // 2])
+                    writer.transport.abort()
+                    cam.cuts += 1
+                    cam.down_until = time.monotonic() + cam.down_s
+                    return
+                writer.write(part)
+                await writer.drain()
+                cam.sent += 1
+                cam.bytes += len(part)
+        finally:
+            cam.clients -= 1
+
+
+def build_cameras(count, defaults, overrides, seed=0):
+    cameras = []
+    for i in range(count):
+        settings = dict(defaults)
+        settings.update(overrides.get(f"cam{i}", {}))
+        cameras.append(FarmCamera(i, settings, seed))
+    return cameras
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Synthetic MJPEG camera farm for ingest load tests")
+    parser.add_argument("--cameras", type=int, default=50)
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8554)
+    parser.add_argument("--size", type=str, default=DEFAULTS["size"], help="WIDTHxHEIGHT")
+    parser.add_argument("--fps", type=float, default=DEFAULTS["fps"])
+    parser.add_argument("--walkers", type=int, default=DEFAULTS["walkers"], help="People per scene")
+    parser.add_argument("--jitter-ms", type=float, default=DEFAULTS["jitter_ms"], help="Mean per-frame delay")
+    parser.add_argument("--drop", type=float, default=DEFAULTS["drop"], help="Frame drop probability")
+    parser.add_argument("--disconnect-s", type=float, default=DEFAULTS["disconnect_s"],
+                        help="Mean seconds before a connection is cut (0 = never)")
+    parser.add_argument("--down-s", type=float, default=DEFAULTS["down_s"],
+                        help="Seconds a camera refuses connections after a cut")
+    parser.add_argument("--quality", type=int, default=DEFAULTS["quality"], help="JPEG quality")
+    parser.add_argument("--config", type=str, default="", help="JSON per-camera overrides {\"cam3\": {...}}")
+    parser.add_argument("--report", type=float, default=10.0, help="Seconds between stats lines")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    defaults = {"size": args.size, "fps": args.fps, "walkers": args.walkers, "jitter_ms": args.jitter_ms,
+                "drop": args.drop, "disconnect_s": args.disconnect_s, "down_s": args.down_s,
+                "quality": args.quality}
+    overrides = {}
+    if args.config:
+        with open(args.config) as f:
+            overrides = json.load(f)
+    farm = CameraFarm(build_cameras(args.cameras, defaults, overrides, args.seed), args.host, args.port)
+    try:
+        asyncio.run(farm.serve(args.report))
+    except KeyboardInterrupt:
+        print("\n[INFO] Camera farm stopped")
@@ -1,27 +1,101 @@
 # centroid_tracker.py
-from scipy.spatial import distance as dist
 from collections import OrderedDict
 import numpy as np
+from track_registry import allocate_id
+
+# Above this many track x detection pairs (and with a max_distance gate),
+# association scores only pairs in neighbouring grid cells
+GRID_MIN_PAIRS = 10000
+
+
+def pairwise_distance(a, b):
+    """Euclidean distance matrix between (N, 2) and (M, 2) point arrays."""
+    diff = a[:, None, :].astype("float") - b[None, :, :].astype("float")
+    return np.sqrt((diff * diff).sum(axis=2))
+
+
+def grid_pairs(a, b, cell):
+    """
+    Candidate (rows, cols) pairs between (N, 2) points a and (M, 2) points b
+    that lie in the same or adjacent cells of a uniform grid. With cell equal
+    to the distance gate, every pair within the gate is included.
+    """
+    ca = np.floor(a / cell).astype(np.int64)
+    cb = np.floor(b / cell).astype(np.int64)
+    origin = np.minimum(ca.min(axis=0), cb.min(axis=0)) - 1
+    ca -= origin
+    cb -= origin
+    width = int(max(ca[:, 0].max(), cb[:, 0].max())) + 2
+    keys_b = cb[:, 1] * width + cb[:, 0]
+    order = np.argsort(keys_b, kind="stable")
+    sorted_keys = keys_b[order]
+
+    rows, cols = [], []
+    for dy in (-1, 0, 1):
+        for dx in (-1, 0, 1):
+            keys = (ca[:, 1] + dy) * width + (ca[:, 0] + dx)
+            lo = np.searchsorted(sorted_keys, keys, "left")
+            counts = np.searchsorted(sorted_keys, keys, "right") - lo
+            total = counts.sum()
+            if total == 0:
+                continue
+            # Expand each row's [lo, lo + count) range of sorted detections
+            starts = np.repeat(lo - np.cumsum(counts) + counts, counts)
+            rows.append(np.repeat(np.arange(len(a)), counts))
+            cols.append(order[starts + np.arange(total)])
+    if not rows:
+        return np.zeros(0, np.int64), np.zeros(0, np.int64)
+    return np.concatenate(rows), np.concatenate(cols)
+
+
+def grid_nearest(a, b, max_distance):
+    """
+    For every point in a, the distance to and index of its nearest point in b
+    within max_distance ((inf, -1) if none), scoring only the sparse set of
+    nearby pairs. Ties go to the lowest index, as with argmin.
+    """
+    (rows, cols) = grid_pairs(a, b, float(max_distance))
+    best_d = np.full(len(a), np.inf)
+    best_col = np.full(len(a), -1, np.int64)
+    if len(rows) == 0:
+        return best_d, best_col
+    diff = a[rows].astype("float") - b[cols].astype("float")
+    d = np.sqrt((diff * diff).sum(axis=1))
+    keep = d <= max_distance
+    if not keep.any():
+        return best_d, best_col
+    (rows, cols, d) = (rows[keep], cols[keep], d[keep])
+    # Sort by row, then distance, then column; the first pair per row wins
+    order = np.lexsort((cols, d, rows))
+    first = order[np.r_[True, rows[order][1:] != rows[order][:-1]]]
+    best_d[rows[first]] = d[first]
+    best_col[rows[first]] = cols[first]
+    return best_d, best_col
+
 
 class CentroidTracker:
-    def __init__(self, max_disappeared=30):
+    def __init__(self, max_disappeared=30, max_distance=None, registry=None):
         self.nextObjectID = 0
+        self.max_distance = max_distance  # no match beyond this many pixels (None = no gate)
+        self.registry = registry  # track_registry.TrackRegistry pruned on deregister
         self.objects = OrderedDict()
         self.disappeared = OrderedDict()
         self.states = {}  # For storing INSIDE/OUTSIDE states
         self.max_disappeared = max_disappeared
 
     def register(self, centroid):
-        self.objects[self.nextObjectID] = centroid
-        self.disappeared[self.nextObjectID] = 0
-        self.states[self.nextObjectID] = "OUTSIDE"
-        self.nextObjectID += 1
+        (objectID, self.nextObjectID) = allocate_id(self.nextObjectID, self.objects)
+        self.objects[objectID] = centroid
+        self.disappeared[objectID] = 0
+        self.states[objectID] = "OUTSIDE"
 
     def deregister(self, objectID):
         del self.objects[objectID]
         del self.disappeared[objectID]
         if objectID in self.states:
             del self.states[objectID]
+        if self.registry is not None:
+            self.registry.on_deregister(objectID)
 
     def update(self, rects):
         if len(rects) == 0:
@@ -42,15 +116,22 @@ class CentroidTracker:
                 self.register(inputCentroids[i])
         else:
             objectIDs = list(self.objects.keys())
-            objectCentroids = list(self.objects.values())
-            D = dist.cdist(np.array(objectCentroids), inputCentroids)
+            objectCentroids = np.array(list(self.objects.values()))
+            if self.max_distance is not None and len(objectCentroids) * len(inputCentroids) > GRID_MIN_PAIRS:
+                (nearest, nearestCols) = grid_nearest(objectCentroids, inputCentroids, self.max_distance)
+            else:
+                D = pairwise_distance(objectCentroids, inputCentroids)
+                (nearest, nearestCols) = (D.min(axis=1), D.argmin(axis=1))
 
-            rows = D.min(axis=1).argsort()
-            cols = D.argmin(axis=1)[rows]
+            # Stable sort so ties resolve the same way on both paths
+            rows = nearest.argsort(kind="stable")
+            cols = nearestCols[rows]
 
             usedRows, usedCols = set(), set()
 
             for (row, col) in zip(rows, cols):
+                if self.max_distance is not None and nearest[row] > self.max_distance:
+                    break  # rows are sorted, so every remaining row is out of range too
                 if row in usedRows or col in usedCols:
                     continue
                 objectID = objectIDs[row]
@@ -59,8 +140,8 @@ class CentroidTracker:
                 usedRows.add(row)
                 usedCols.add(col)
 
-            unusedRows = set(range(0, D.shape[0])).difference(usedRows)
-            unusedCols = set(range(0, D.shape[1])).difference(usedCols)
+            unusedRows = set(range(0, len(objectIDs))).difference(usedRows)
+            unusedCols = set(range(0, len(inputCentroids))).difference(usedCols)
 
             for row in unusedRows:
                 objectID = objectIDs[row]
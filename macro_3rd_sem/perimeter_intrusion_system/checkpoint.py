@@ -0,0 +1,65 @@
+# checkpoint.py
+"""
+Atomic checkpoint files for tracker and zone state.
+
+A checkpoint is a plain .npz of named arrays plus the wall-clock time it
+was written. It is written to a temporary file, fsync()ed and renamed over
+the previous one, so a crash mid-write leaves the last good checkpoint in
+place. On startup read_checkpoint() only returns it if it is recent
+enough: after a short supervisor restart the people on screen are still
+the ones in the checkpoint, but after a long outage they are not.
+"""
+
+import os
+import time
+import zipfile
+import numpy as np
+
+
+def write_checkpoint(path, arrays):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, saved_at=np.array(time.time()), **arrays)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def read_checkpoint(path, max_age):
+    """The arrays saved at path, or None if missing, unreadable or older than max_age seconds."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path) as data:
+            arrays = {name: data[name] for name in data.files}
+    except (OSError, ValueError, zipfile.BadZipFile) as e:
+        print(f"[WARN] Ignoring unreadable checkpoint {path}: {e}")
+        return None
+    age = time.time() - float(arrays.pop("saved_at", 0))
+    if not 0 <= age <= max_age:
+        print(f"[INFO] Checkpoint {path} is {age:.0f}s old; starting fresh")
+        return None
+    return arrays
+
+
+class Checkpointer:
+    def __init__(self, path, interval=2.0, max_age=30.0):
+        self.path = path
+        self.interval = interval    # seconds between periodic checkpoints
+        self.max_age = max_age      # staleness window for restoring
+        self.last_save = 0.0
+        self.save_time = 0.0        # seconds spent writing, for the exit summary
+        self.saves = 0
+
+    def due(self):
+        return time.time() - self.last_save >= self.interval
+
+    def save(self, arrays):
+        start = time.perf_counter()
+        write_checkpoint(self.path, arrays)
+        self.last_save = time.time()
+        self.save_time += time.perf_counter() - start
+        self.saves += 1
+
+    def load(self):
+        return read_checkpoint(self.path, self.max_age)
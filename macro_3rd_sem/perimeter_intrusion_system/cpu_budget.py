@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Node-wide CPU budget for OpenCV threads across camera processes.
+
+Every PerimeterIntrusionSystem process lets OpenCV size its thread pool to
+the whole machine, so several cameras on one node oversubscribe the cores.
+With --cpu-budget FILE, each process joins a shared budget file on start
+and leaves it on exit. The file holds the plan for all live streams on the
+node, which is a thread count and optionally a set of CPUs for each stream.
+The plan is recomputed whenever a stream joins or leaves, or when a
+running client notices that a listed process has died. Every process picks
+up its new budget within a second.
+
+The layout comes from a calibration run that times one forward pass at 1,
+2, 4, ... threads:
+
+- With as many streams as cores or more, each stream gets one thread
+  (many processes x one thread), spread round-robin over the cores.
+- With fewer streams, each could get a slice of cores. The calibration
+  decides whether that pays: if a second thread already adds less than
+  MIN_EFFICIENCY of a core's worth of speed-up, the streams stay at one
+  thread each (many x one) and the spare cores are left for decoding.
+  Otherwise each stream runs few x many, with the most threads within its
+  slice that still scale that well. Before any calibration the whole
+  slice is used.
+
+    python cpu_budget.py --calibrate        # once per node (synthetic weights if no model)
+    python cpu_budget.py --show
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import time
+import cv2
+import numpy as np
+
+BUDGET_FILE = "cpu_budget.json"
+MIN_EFFICIENCY = 0.6   # speed-up per thread below this is not worth the cores
+
+
+def available_cpus():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def apply_budget(threads, cpus=None):
+    """Limit this process's OpenCV pool (and optionally pin it to cpus)."""
+    cv2.setNumThreads(int(threads))
+    if cpus and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, cpus)
+        except OSError as e:
+            # The recorded node CPU list no longer matches this machine; run unpinned
+            print(f"[WARN] Could not pin to CPUs {cpus}: {e} (re-run --calibrate to refresh the CPU list)")
+
+
+def calibrate(net, max_threads, size=300, runs=5):
+    """Median forward-pass time in ms at 1, 2, 4, ... max_threads threads."""
+    blob = cv2.dnn.blobFromImage(np.random.default_rng(0).integers(0, 255, (size, size, 3), dtype=np.uint8),
+                                 0.007843, (size, size), 127.5)
+    results = {}
+    threads = 1
+    while True:
+        cv2.setNumThreads(threads)
+        times = []
+        for _ in range(runs + 1):   # first run warms up
+            net.setInput(blob)
+            start = time.perf_counter()
+            net.forward()
+            times.append(time.perf_counter() - start)
+        results[threads] = float(np.median(times[1:]) * 1000)
+        if threads >= max_threads:
+            break
+        threads = min(threads * 2, max_threads)
+    return results
+
+
+def useful_threads(calibration, limit):
+    """Most threads (up to limit) whose calibrated parallel efficiency is still MIN_EFFICIENCY."""
+    if not calibration:
+        return limit   # not calibrated: use the whole slice
+    base = calibration[1]
+    best = 1
+    for (threads, ms) in sorted(calibration.items()):
+        if threads <= limit and base / ms / threads >= MIN_EFFICIENCY:
+            best = threads
+    return best
+
+
+def choose_layout(n_streams, cpus, calibration):
+    """("many x one", 1) or ("few x many", threads per stream) for n_streams on cpus."""
+    if n_streams >= len(cpus):
+        return "many x one", 1
+    threads = useful_threads(calibration, len(cpus) // n_streams)
+    if threads == 1:
+        # Extra threads do not scale on this node: one per process, spare cores decode
+        return "many x one", 1
+    return "few x many", threads
+
+
+def plan(streams, cpus, calibration, pin=False):
+    """(layout, {stream: {"threads": n, "cpus": [...] or None}}) for the given live streams."""
+    streams = sorted(streams)
+    if not streams:
+        return None, {}
+    (layout, threads) = choose_layout(len(streams), cpus, calibration)
+    budgets = {}
+    if layout == "many x one":
+        for (i, name) in enumerate(streams):
+            budgets[name] = {"threads": 1, "cpus": [cpus[i % len(cpus)]] if pin else None}
+    else:
+        # Spare cores in a slice are left for decoding
+        width = len(cpus) // len(streams)
+        for (i, name) in enumerate(streams):
+            budgets[name] = {"threads": threads, "cpus": cpus[i * width:(i + 1) * width] if pin else None}
+    return layout, budgets
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+@contextlib.contextmanager
+def _locked(path):
+    import fcntl
+    with open(path + ".lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def update(path, join=None, leave=None, calibration=None, pin=None, cpus=None):
+    """
+    Change the stream set (or calibration) and rewrite the plan. Returns the new file content.
+
+    The node's CPU list is recorded when the file is created (or passed in by
+    --calibrate) and reused afterwards: a camera process that has already been
+    pinned only sees its own cores, and a rebalance it triggers must still
+    plan for the whole node.
+    """
+    with _locked(path):
+        data = _read(path)
+        streams = {name: pid for (name, pid) in data.get("streams", {}).items() if _alive(pid)}
+        if join is not None:
+            streams[join] = os.getpid()
+        if leave is not None:
+            streams.pop(leave, None)
+        if calibration is not None:
+            data["calibration"] = {str(t): ms for (t, ms) in calibration.items()}
+        if pin is not None:
+            data["pin"] = pin
+        measured = {int(t): ms for (t, ms) in data.get("calibration", {}).items()}
+        cpus = cpus or data.get("cpus") or available_cpus()
+        (layout, budgets) = plan(streams, cpus, measured, data.get("pin", False))
+        data.update(streams=streams, cpus=cpus, max_threads=useful_threads(measured, len(cpus)),
+                    layout=layout, budgets=budgets)
+        _write(path, data)
+        return data
+
+
+class BudgetClient:
+    """One stream's membership in the node budget file."""
+
+    def __init__(self, path, camera_id, check_interval=1.0):
+        self.path = path
+        self.camera_id = camera_id
+        # Entries are per process: several processes left at the default camera name must
+        # not share (and on the first leave() drop) a single entry
+        self.key = f"{camera_id}:{os.getpid()}"
+        self.check_interval = check_interval
+        self.last_check = 0.0
+        self.mtime = None
+        self.budget = None
+        self.pids = {}        # entries listed in the file -> their pid, to notice dead processes
+
+    def join(self):
+        update(self.path, join=self.key)
+        self.poll(force=True)
+
+    def leave(self):
+        update(self.path, leave=self.key)
+
+    def poll(self, force=False):
+        """Apply the budget if the plan changed. Cheap: one stat() and a kill(pid, 0) per stream per check_interval."""
+        now = time.time()
+        if not force and now - self.last_check < self.check_interval:
+            return False
+        self.last_check = now
+        if any(not _alive(pid) for pid in self.pids.values()):
+            # A camera died without leaving (SIGKILL, OOM): hand its cores back
+            update(self.path)
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return False
+        if mtime == self.mtime and not force:
+            return False
+        self.mtime = mtime
+        data = _read(self.path)
+        self.pids = data.get("streams", {})
+        budget = data.get("budgets", {}).get(self.key)
+        if budget is None or budget == self.budget:
+            return False
+        self.budget = budget
+        apply_budget(budget["threads"], budget["cpus"])
+        pinned = f" on CPUs {budget['cpus']}" if budget["cpus"] else ""
+        print(f"[INFO] CPU budget: {budget['threads']} OpenCV thread(s){pinned}")
+        return True
+
+
+def _calibration_net():
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    prototxt = os.path.join(base_dir, "models", "MobileNetSSD_deploy.prototxt")
+    caffemodel = os.path.join(base_dir, "models", "MobileNetSSD_deploy.caffemodel")
+    if os.path.exists(caffemodel):
+        import model_cache
+        return "MobileNet-SSD", model_cache.load_net(prototxt, caffemodel)
+    from synthetic_model import load_synthetic_net
+    return "MobileNet-SSD (synthetic weights)", load_synthetic_net(prototxt)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Node CPU budget for camera processes")
+    parser.add_argument("--budget", type=str, default=BUDGET_FILE, help="Budget file shared by the node")
+    parser.add_argument("--calibrate", action="store_true", help="Time the detector at 1..N threads")
+    parser.add_argument("--pin", choices=["on", "off"], help="Pin streams to their CPUs")
+    parser.add_argument("--show", action="store_true", help="Print the current plan")
+    args = parser.parse_args()
+
+    calibration = None
+    if args.calibrate:
+        (name, net) = _calibration_net()
+        calibration = calibrate(net, len(available_cpus()))
+        print(f"[INFO] Calibrated {name}:")
+        for (threads, ms) in calibration.items():
+            print(f"[INFO]   {threads:>3} threads: {ms:7.1f} ms/frame  "
+                  f"(efficiency {calibration[1] / ms / threads:.0%})")
+    data = update(args.budget, calibration=calibration, pin=None if args.pin is None else args.pin == "on",
+                  cpus=available_cpus() if args.calibrate else None)
+    if args.show or args.calibrate or args.pin:
+        print(f"[INFO] {len(data['cpus'])} CPUs, up to {data['max_threads']} useful thread(s) per stream"
+              + (f", layout {data['layout']}" if data["layout"] else ""))
+        for (name, budget) in sorted(data["budgets"].items()):
+            print(f"[INFO]   {name}: {budget['threads']} thread(s)"
+                  + (f" on CPUs {budget['cpus']}" if budget["cpus"] else ""))
@@ -7,6 +7,29 @@ import cv2
 import numpy as np
 import os
 
+def draw_background(frame, spacing=100):
+    """Dark grey floor with a grid, for a little texture."""
+    (height, width) = frame.shape[:2]
+    frame[:] = 50
+    for i in range(0, width, spacing):
+        cv2.line(frame, (i, 0), (i, height), (80, 80, 80), 1)
+    for i in range(0, height, spacing):
+        cv2.line(frame, (0, i), (width, i), (80, 80, 80), 1)
+    return frame
+
+def draw_person(frame, x, y, skin, shirt, legs, scale=1.0):
+    """Person-like shape (head, body, arms, legs), 40x125 px at scale 1; (x, y) is the head's top left area."""
+    def p(dx, dy):
+        return (int(x + dx * scale), int(y + dy * scale))
+    cv2.circle(frame, p(20, 0), int(15 * scale), skin, -1)  # Head
+    cv2.circle(frame, p(17, -3), max(1, int(3 * scale)), (0, 0, 0), -1)  # Left eye
+    cv2.circle(frame, p(23, -3), max(1, int(3 * scale)), (0, 0, 0), -1)  # Right eye
+    cv2.rectangle(frame, p(10, 15), p(30, 70), shirt, -1)  # Body
+    cv2.rectangle(frame, p(0, 25), p(10, 35), skin, -1)  # Left arm
+    cv2.rectangle(frame, p(30, 25), p(40, 35), skin, -1)  # Right arm
+    cv2.rectangle(frame, p(12, 70), p(18, 110), legs, -1)  # Left leg
+    cv2.rectangle(frame, p(22, 70), p(28, 110), legs, -1)  # Right leg
+
 def create_realistic_test_video():
     """Create a test video with more realistic person-like shapes."""
     
@@ -27,13 +50,7 @@ def create_realistic_test_video():
     
     for frame_num in range(total_frames):
         # Create blank frame with background
-        frame = np.ones((height, width, 3), dtype=np.uint8) * 50  # Dark gray background
-        
-        # Add some texture to make it look more realistic
-        for i in range(0, width, 100):
-            cv2.line(frame, (i, 0), (i, height), (80, 80, 80), 1)
-        for i in range(0, height, 100):
-            cv2.line(frame, (0, i), (width, i), (80, 80, 80), 1)
+        frame = draw_background(np.empty((height, width, 3), dtype=np.uint8))
         
         # Create more realistic person-like objects
         time_factor = frame_num / total_frames
@@ -42,22 +59,8 @@ def create_realistic_test_video():
         obj1_x = int(50 + (width - 200) * (time_factor % 1.0))
         obj1_y = height // 3
         
-        # Draw person-like shape with head, body, arms, legs
-        # Head (circle)
-        cv2.circle(frame, (obj1_x + 20, obj1_y), 15, (220, 180, 140), -1)  # Skin color
-        cv2.circle(frame, (obj1_x + 17, obj1_y - 3), 3, (0, 0, 0), -1)  # Left eye
-        cv2.circle(frame, (obj1_x + 23, obj1_y - 3), 3, (0, 0, 0), -1)  # Right eye
-        
-        # Body (rectangle)
-        cv2.rectangle(frame, (obj1_x + 10, obj1_y + 15), (obj1_x + 30, obj1_y + 70), (100, 150, 200), -1)  # Blue shirt
-        
-        # Arms (horizontal rectangles)
-        cv2.rectangle(frame, (obj1_x, obj1_y + 25), (obj1_x + 10, obj1_y + 35), (220, 180, 140), -1)  # Left arm
-        cv2.rectangle(frame, (obj1_x + 30, obj1_y + 25), (obj1_x + 40, obj1_y + 35), (220, 180, 140), -1)  # Right arm
-        
-        # Legs (vertical rectangles)
-        cv2.rectangle(frame, (obj1_x + 12, obj1_y + 70), (obj1_x + 18, obj1_y + 110), (50, 50, 50), -1)  # Left leg
-        cv2.rectangle(frame, (obj1_x + 22, obj1_y + 70), (obj1_x + 28, obj1_y + 110), (50, 50, 50), -1)  # Right leg
+        # Draw person-like shape with head, body, arms, legs (blue shirt)
+        draw_person(frame, obj1_x, obj1_y, (220, 180, 140), (100, 150, 200), (50, 50, 50))
         
         # Person 2: Walking in a different pattern (appears later)
         if frame_num > 100:
@@ -65,30 +68,16 @@ def create_realistic_test_video():
             obj2_x = int(width - 100 - (width - 250) * late_time)
             obj2_y = 2 * height // 3
             
-            # Draw second person
-            cv2.circle(frame, (obj2_x + 20, obj2_y), 15, (200, 160, 120), -1)  # Head
-            cv2.circle(frame, (obj2_x + 17, obj2_y - 3), 3, (0, 0, 0), -1)  # Left eye
-            cv2.circle(frame, (obj2_x + 23, obj2_y - 3), 3, (0, 0, 0), -1)  # Right eye
-            cv2.rectangle(frame, (obj2_x + 10, obj2_y + 15), (obj2_x + 30, obj2_y + 70), (150, 100, 100), -1)  # Red shirt
-            cv2.rectangle(frame, (obj2_x, obj2_y + 25), (obj2_x + 10, obj2_y + 35), (200, 160, 120), -1)  # Left arm
-            cv2.rectangle(frame, (obj2_x + 30, obj2_y + 25), (obj2_x + 40, obj2_y + 35), (200, 160, 120), -1)  # Right arm
-            cv2.rectangle(frame, (obj2_x + 12, obj2_y + 70), (obj2_x + 18, obj2_y + 110), (30, 30, 30), -1)  # Left leg
-            cv2.rectangle(frame, (obj2_x + 22, obj2_y + 70), (obj2_x + 28, obj2_y + 110), (30, 30, 30), -1)  # Right leg
+            # Draw second person (red shirt)
+            draw_person(frame, obj2_x, obj2_y, (200, 160, 120), (150, 100, 100), (30, 30, 30))
         
         # Person 3: Standing still in the center (for testing)
         if frame_num > 200:
             obj3_x = width // 2
             obj3_y = height // 2
             
-            # Draw third person
-            cv2.circle(frame, (obj3_x + 20, obj3_y), 15, (180, 140, 100), -1)  # Head
-            cv2.circle(frame, (obj3_x + 17, obj3_y - 3), 3, (0, 0, 0), -1)  # Left eye
-            cv2.circle(frame, (obj3_x + 23, obj3_y - 3), 3, (0, 0, 0), -1)  # Right eye
-            cv2.rectangle(frame, (obj3_x + 10, obj3_y + 15), (obj3_x + 30, obj3_y + 70), (100, 200, 100), -1)  # Green shirt
-            cv2.rectangle(frame, (obj3_x, obj3_y + 25), (obj3_x + 10, obj3_y + 35), (180, 140, 100), -1)  # Left arm
-            cv2.rectangle(frame, (obj3_x + 30, obj3_y + 25), (obj3_x + 40, obj3_y + 35), (180, 140, 100), -1)  # Right arm
-            cv2.rectangle(frame, (obj3_x + 12, obj3_y + 70), (obj3_x + 18, obj3_y + 110), (40, 40, 40), -1)  # Left leg
-            cv2.rectangle(frame, (obj3_x + 22, obj3_y + 70), (obj3_x + 28, obj3_y + 110), (40, 40, 40), -1)  # Right leg
+            # Draw third person (green shirt)
+            draw_person(frame, obj3_x, obj3_y, (180, 140, 100), (100, 200, 100), (40, 40, 40))
         
         # Add frame number and instructions
         cv2.putText(frame, f"Frame: {frame_num}/{total_frames}", 
@@ -1,19 +1,26 @@
 #!/usr/bin/env python3
 """
 Demo mode for Perimeter Intrusion Detection System
-This version works without the MobileNet-SSD model files by using simple rectangle detection.
+This version works without the MobileNet-SSD model files: detections come
+from tracker_eval.GroundTruthSimulator, people walking past and across the
+perimeter you draw.
 """
 
 import cv2
 import numpy as np
 import argparse
 import time
+from collections import deque
 from datetime import datetime
 from centroid_tracker import CentroidTracker
+from track_registry import TrackRegistry
+from tracker_eval import GroundTruthSimulator
 
 # Constants
 SKIP_FRAMES = 3
 DEBOUNCE_FRAMES = 2
+DEMO_PEOPLE = 6  # Simulated people in the scene at once
+MAX_ALERTS_KEPT = 1000  # Only the most recent alerts are kept for the summary
 COLOR_BLUE = (255, 0, 0)
 COLOR_GREEN = (0, 255, 0)
 COLOR_RED = (0, 0, 255)
@@ -26,11 +33,16 @@ class DemoIntrusionDetector:
     def __init__(self, video_source):
         self.video_source = video_source
         self.cap = None
-        self.tracker = CentroidTracker(max_disappeared=50, max_distance=50)
+        self.registry = TrackRegistry()  # per-track side tables, pruned with the tracker
+        self.tracker = CentroidTracker(max_disappeared=50, max_distance=50, registry=self.registry)
+        self.state_change_frames = self.registry.table("state_change_frames")  # object_id -> frames since last state change
+        self.simulator = None
+        self.last_boxes = []
         self.perimeter_points = []
         self.perimeter_defined = False
         self.frame_count = 0
-        self.alerts_log = []
+        self.alerts_log = deque(maxlen=MAX_ALERTS_KEPT)
+        self.alert_count = 0
         
     def mouse_callback(self, event, x, y, flags, param):
         """Mouse callback for defining perimeter polygon."""
@@ -73,11 +85,13 @@ class DemoIntrusionDetector:
             
             if key == ord('d') and len(self.perimeter_points) >= 3:
                 self.perimeter_defined = True
+                self.simulator = None
                 cv2.destroyWindow("Define Perimeter - Click points, press 'd' when done")
                 print(f"✓ Perimeter defined with {len(self.perimeter_points)} points")
                 return True
             elif key == ord('r'):
                 self.perimeter_points = []
+                self.simulator = None
                 print("Reset perimeter points")
             elif key == ord('q'):
                 cv2.destroyAllWindows()
@@ -86,27 +100,12 @@ class DemoIntrusionDetector:
         return False
     
     def detect_objects_demo(self, frame):
-        """Demo object detection - creates moving rectangles."""
-        boxes = []
-        height, width = frame.shape[:2]
-        
-        # Create some demo objects that move across the frame
-        time_factor = self.frame_count / 300.0  # Assuming 300 frame video
-        
-        # Object 1: Moving from left to right
-        obj1_x = int(50 + (width - 150) * (time_factor % 1.0))
-        obj1_y = height // 3
-        boxes.append((obj1_x, obj1_y, obj1_x + 40, obj1_y + 80))
-        
-        # Object 2: Moving in circular pattern
-        if self.frame_count > 50:  # Start after some frames
-            center_x, center_y = width // 2, height // 2
-            radius = 100
-            angle = (self.frame_count - 50) * 0.1
-            obj2_x = int(center_x + radius * np.cos(angle))
-            obj2_y = int(center_y + radius * np.sin(angle))
-            boxes.append((obj2_x, obj2_y, obj2_x + 40, obj2_y + 80))
-        
+        """Demo object detection - simulated people walking past and across the perimeter."""
+        if self.simulator is None:
+            height, width = frame.shape[:2]
+            self.simulator = GroundTruthSimulator(width, height, self.perimeter_points, people=10 ** 9,
+                                                  max_concurrent=DEMO_PEOPLE, fps=30.0 / SKIP_FRAMES)
+        boxes, _, _ = self.simulator.step()
         return boxes
     
     def check_perimeter_intrusion(self, centroid):
@@ -139,7 +138,10 @@ class DemoIntrusionDetector:
     
     def draw_objects(self, frame, objects, states):
         """Draw bounding boxes and centroids."""
+        for (startX, startY, endX, endY) in self.last_boxes:
+            cv2.rectangle(frame, (startX, startY), (endX, endY), COLOR_WHITE, 1)
         for (object_id, centroid) in objects.items():
+            centroid = (int(centroid[0]), int(centroid[1]))
             state = states.get(object_id, "OUTSIDE")
             color = COLOR_RED if state == "INSIDE" else COLOR_GREEN
             
@@ -157,29 +159,34 @@ class DemoIntrusionDetector:
         
         if self.frame_count % SKIP_FRAMES == 0:
             boxes = self.detect_objects_demo(frame)
-            objects, states = self.tracker.update(boxes)
+            self.last_boxes = boxes
+            objects = self.tracker.update(boxes)
+            states = self.tracker.get_states()
             
             timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             
             for (object_id, centroid) in objects.items():
-                is_inside = self.check_perimeter_intrusion(centroid)
+                is_inside = self.check_perimeter_intrusion((int(centroid[0]), int(centroid[1])))
                 new_state = "INSIDE" if is_inside else "OUTSIDE"
                 old_state = states.get(object_id, "OUTSIDE")
                 
                 self.tracker.update_state(object_id, new_state)
-                frames_since_change = self.tracker.get_state_change_frames(object_id)
+                frames_since_change = self.state_change_frames.get(object_id, DEBOUNCE_FRAMES)
+                self.state_change_frames[object_id] = 0 if old_state != new_state else frames_since_change + 1
                 
                 if (old_state != new_state and frames_since_change >= DEBOUNCE_FRAMES):
                     if new_state == "INSIDE":
                         alert_msg = f"[ALERT] Object {object_id} ENTERED perimeter at {timestamp}"
                         print(alert_msg)
                         self.alerts_log.append(alert_msg)
+                        self.alert_count += 1
                     else:
                         alert_msg = f"[ALERT] Object {object_id} EXITED perimeter at {timestamp}"
                         print(alert_msg)
                         self.alerts_log.append(alert_msg)
+                        self.alert_count += 1
         
-        objects, states = self.tracker.objects, self.tracker.object_states
+        objects, states = self.tracker.objects, self.tracker.get_states()
         
         frame = self.draw_perimeter(frame)
         frame = self.draw_objects(frame, objects, states)
@@ -237,6 +244,7 @@ class DemoIntrusionDetector:
                 elif key == ord('r'):
                     self.perimeter_points = []
                     self.perimeter_defined = False
+                    self.simulator = None   # rebuilt around the new perimeter
                     print("Perimeter reset. Please redefine...")
                     if not self.define_perimeter(frame):
                         break
@@ -253,7 +261,9 @@ class DemoIntrusionDetector:
             cv2.destroyAllWindows()
             
             print(f"\n=== Demo Summary ===")
-            print(f"Total alerts: {len(self.alerts_log)}")
+            print(f"Total alerts: {self.alert_count}")
+            if self.alert_count > len(self.alerts_log):
+                print(f"(showing the last {len(self.alerts_log)})")
             for alert in self.alerts_log:
                 print(alert)
 
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Pick the detector input size and model variant per camera.
+
+Runs every available variant (the shipped Caffe MobileNet-SSD, plus any
+models/*.onnx export, e.g. a quantized one, with the same SSD output
+layout) at several input sizes over frames of a local clip from the
+camera. For each combination it measures the median latency and the recall
+of person detections against a reference. The reference is either labels
+(--labels, JSON lines {"frame": i, "boxes": [[x1, y1, x2, y2], ...]}) or,
+without labels, the detections of the most expensive combination.
+
+The cheapest combination that keeps --min-recall is written to
+profiles/<camera>.json, which main.py loads for that camera. The sizes
+after it are cheaper fallbacks for the load governor. Non-square sizes
+matching the camera's aspect ratio are tried too.
+
+--synthetic runs with random weights (synthetic_model.py) so latency can
+be measured without the model download; recall is meaningless then, so
+no profile is written.
+
+    python detector_tuner.py --video videos/test_video.mp4 --camera cam0
+"""
+
+import argparse
+import glob
+import json
+import os
+import time
+import cv2
+import numpy as np
+import model_cache
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROFILE_DIR = "profiles"
+PERSON_CLASS = 15          # VOC index used by MobileNet-SSD
+SCALE = 0.007843
+MEAN = 127.5
+MATCH_IOU = 0.5
+
+
+def find_variants(synthetic=False):
+    """[(name, model files)] for the detector variants present in models/."""
+    prototxt = os.path.join("models", "MobileNetSSD_deploy.prototxt")
+    caffemodel = os.path.join("models", "MobileNetSSD_deploy.caffemodel")
+    variants = []
+    if synthetic:
+        variants.append(("caffe-synthetic", [prototxt]))
+    elif os.path.exists(os.path.join(BASE_DIR, caffemodel)):
+        variants.append(("caffe", [prototxt, caffemodel]))
+    for path in sorted(glob.glob(os.path.join(BASE_DIR, "models", "*.onnx"))):
+        variants.append((os.path.splitext(os.path.basename(path))[0], [os.path.relpath(path, BASE_DIR)]))
+    return variants
+
+
+def load_variant(files):
+    paths = [os.path.join(BASE_DIR, f) for f in files]
+    if len(paths) == 1 and paths[0].endswith(".prototxt"):
+        from synthetic_model import load_synthetic_net
+        return load_synthetic_net(paths[0])
+    if len(paths) == 2:
+        return model_cache.load_net(*paths)
+    return cv2.dnn.readNet(paths[0])
+
+
+def detect(net, frame, size, confidence=0.3, scale=SCALE, mean=MEAN):
+    """Person boxes for one frame at input size (w, h); same decoding as main.detect_objects."""
+    (h, w) = frame.shape[:2]
+    blob = cv2.dnn.blobFromImage(cv2.resize(frame, size), scale, size, mean)
+    net.setInput(blob)
+    detections = net.forward()
+    keep = (detections[0, 0, :, 2] > confidence) & (detections[0, 0, :, 1].astype(int) == PERSON_CLASS)
+    return (detections[0, 0, keep, 3:7] * np.array([w, h, w, h])).astype(int)
+
+
+def recall(found, reference):
+    """Fraction of reference boxes matched by a found box (IoU >= MATCH_IOU, one-to-one)."""
+    if len(reference) == 0:
+        return None
+    used = set()
+    matched = 0
+    for ref in reference:
+        for (i, box) in enumerate(found):
+            if i in used:
+                continue
+            ix = max(0, min(ref[2], box[2]) - max(ref[0], box[0]))
+            iy = max(0, min(ref[3], box[3]) - max(ref[1], box[1]))
+            inter = ix * iy
+            union = (ref[2] - ref[0]) * (ref[3] - ref[1]) + (box[2] - box[0]) * (box[3] - box[1]) - inter
+            if union > 0 and inter / union >= MATCH_IOU:
+                used.add(i)
+                matched += 1
+                break
+    return matched / len(reference)
+
+
+def candidate_sizes(sizes, aspect):
+    """Square sizes plus, for non-4:3-ish cameras, the same heights at the camera's aspect ratio."""
+    out = [(s, s) for s in sizes]
+    if abs(aspect - 1.0) > 0.2:
+        out += [(int(round(s * aspect / 16.0)) * 16, s) for s in sizes]
+    return out
+
+
+def read_frames(video, count, every):
+    vs = cv2.VideoCapture(video)
+    frames = []
+    index = 0
+    while len(frames) < count:
+        ok, frame = vs.read()
+        if not ok:
+            break
+        if index % every == 0:
+            frames.append((index, frame))
+        index += 1
+    vs.release()
+    return frames
+
+
+def load_labels(path):
+    labels = {}
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                labels[int(record["frame"])] = [tuple(b) for b in record["boxes"]]
+    return labels
+
+
+def tune(frames, variants, sizes, labels=None):
+    """One result per variant and size (median ms, recall or None), cheapest first."""
+    runs = []
+    for (name, files) in variants:
+        net = load_variant(files)
+        for size in sizes:
+            detect(net, frames[0][1], size)   # warm-up
+            times, found = [], {}
+            for (index, frame) in frames:
+                start = time.perf_counter()
+                found[index] = detect(net, frame, size)
+                times.append(time.perf_counter() - start)
+            runs.append({"variant": name, "files": files, "size": size,
+                         "ms": float(np.median(times) * 1000), "found": found})
+
+    if labels is None and not any(r["variant"].endswith("synthetic") for r in runs):
+        # Self-consistent reference: what the most expensive combination sees
+        labels = max(runs, key=lambda r: r["ms"])["found"]
+    for run in runs:
+        scores = [recall(run["found"][i], labels.get(i, [])) for (i, _) in frames] if labels else []
+        scores = [s for s in scores if s is not None]
+        run["recall"] = float(np.mean(scores)) if scores else None
+    return sorted(runs, key=lambda r: r["ms"])
+
+
+def choose(runs, min_recall):
+    ok = [r for r in runs if r["recall"] is not None and r["recall"] >= min_recall]
+    if ok:
+        return ok[0]
+    measured = [r for r in runs if r["recall"] is not None]
+    return max(measured, key=lambda r: r["recall"]) if measured else None
+
+
+def write_profile(camera_id, best, runs, video):
+    # The next two cheaper sizes of the same variant become the governor's fallbacks
+    fallbacks = [list(r["size"]) for r in sorted(runs, key=lambda r: -r["ms"])
+                 if r["variant"] == best["variant"] and r["ms"] < best["ms"]]
+    profile = {
+        "camera": camera_id, "variant": best["variant"], "model": best["files"],
+        "input_sizes": [list(best["size"])] + fallbacks[:2],
+        "scale": SCALE, "mean": MEAN,
+        "latency_ms": round(best["ms"], 2), "recall": round(best["recall"], 3),
+        "clip": video, "tuned_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"{camera_id}.json")
+    with open(path, "w") as f:
+        json.dump(profile, f, indent=2)
+    return path
+
+
+def load_profile(path):
+    with open(path) as f:
+        profile = json.load(f)
+    profile["input_sizes"] = [tuple(s) for s in profile["input_sizes"]]
+    return profile
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-camera detector input size / variant tuner")
+    parser.add_argument("--video", type=str, required=True, help="Evaluation clip from this camera")
+    parser.add_argument("--camera", type=str, default="cam0")
+    parser.add_argument("--frames", type=int, default=40, help="Frames to evaluate")
+    parser.add_argument("--every", type=int, default=5, help="Use every Nth frame of the clip")
+    parser.add_argument("--sizes", type=str, default="300,256,224,192,160", help="Input heights to try")
+    parser.add_argument("--labels", type=str, default="", help="Reference boxes (JSON lines)")
+    parser.add_argument("--min-recall", type=float, default=0.95)
+    parser.add_argument("--synthetic", action="store_true", help="Random weights: timing only, no profile")
+    args = parser.parse_args()
+
+    frames = read_frames(args.video, args.frames, args.every)
+    if not frames:
+        print(f"[ERROR] Could not read frames from {args.video}")
+        raise SystemExit(1)
+    variants = find_variants(args.synthetic)
+    if not variants:
+        print("[ERROR] No detector model found; download it or run with --synthetic")
+        raise SystemExit(1)
+    (h, w) = frames[0][1].shape[:2]
+    sizes = candidate_sizes([int(s) for s in args.sizes.split(",")], w / h)
+    labels = load_labels(args.labels) if args.labels else None
+
+    runs = tune(frames, variants, sizes, labels)
+    print(f"{'variant':<24}{'input':>10}{'ms':>9}{'recall':>9}")
+    for run in runs:
+        r = "-" if run["recall"] is None else f"{run['recall']:.1%}"
+        print(f"{run['variant']:<24}{'%dx%d' % run['size']:>10}{run['ms']:>9.1f}{r:>9}")
+
+    best = None if args.synthetic else choose(runs, args.min_recall)
+    if best is None:
+        print("[INFO] Timing only (no reference detections); no profile written")
+    else:
+        path = write_profile(args.camera, best, runs, args.video)
+        print(f"[INFO] {best['variant']} at {best['size'][0]}x{best['size'][1]}: "
+              f"{best['ms']:.1f} ms, recall {best['recall']:.1%} -> {path}")
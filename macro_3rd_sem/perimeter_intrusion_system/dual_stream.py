@@ -0,0 +1,120 @@
+# dual_stream.py
+"""
+High-resolution evidence stream for dual-stream cameras.
+
+Most IP cameras publish a low-resolution substream next to the main
+stream. Detection only needs the substream (every frame is shrunk to the
+detector input anyway), but alert snapshots should come from the main
+stream. EvidenceStream keeps the main stream open and only grab()s it, so
+it costs demuxing but no decode; a frame is retrieve()d only when an alert
+asks for it, at the substream frame's timestamp. Boxes found on the
+substream are scaled to main-stream pixels with scale_box().
+"""
+
+import threading
+import time
+import cv2
+from video_reader import StrideVideoReader
+
+
+def scale_box(box, from_shape, to_shape):
+    """Map a (startX, startY, endX, endY) box between two frame sizes."""
+    sx = to_shape[1] / from_shape[1]
+    sy = to_shape[0] / from_shape[0]
+    (startX, startY, endX, endY) = box
+    return (int(startX * sx), int(startY * sy), int(endX * sx), int(endY * sy))
+
+
+class EvidenceStream:
+    def __init__(self, source, offset=0.0, max_wait=0.2):
+        self.reader = StrideVideoReader(source)
+        self.offset = offset        # main stream time minus substream time for the same instant
+        self.max_wait = max_wait    # live: how long a snapshot may wait for the main stream to catch up
+        self.cond = threading.Condition()   # guards the fields below; never held across grab()
+        self.capture = threading.Lock()     # one of grab()/retrieve() at a time on the capture
+        self.timestamp = None               # main-stream time of the last grabbed frame
+        self.targets = []                   # main-stream times snapshots are waiting for
+        self.retrieving = 0                 # snapshots about to decode; the grab loop yields to them
+        self.stopped = False
+        self.thread = None
+        self.misaligned = 0         # snapshots taken further than one frame from the requested time
+
+    def isOpened(self):
+        return self.reader.isOpened()
+
+    def start(self):
+        # A live stream has to be drained continuously or the backend buffers
+        # and the frame we retrieve later is stale; a file is read on demand
+        if self.reader.live:
+            self.thread = threading.Thread(target=self._grab_loop, name="evidence-grab", daemon=True)
+            self.thread.start()
+
+    def _grab_loop(self):
+        while not self.stopped:
+            with self.cond:
+                # Do not grab past a frame a snapshot is waiting for
+                while not self.stopped and (self.retrieving or (
+                        self.timestamp is not None and any(t <= self.timestamp for t in self.targets))):
+                    self.cond.wait()
+            # The blocking grab runs without the condition, so retrieve_at() can
+            # always see the newest timestamp and claim the capture next
+            with self.capture:
+                ok = self.reader.grab()
+                timestamp = self.reader.timestamp
+            with self.cond:
+                self.timestamp = timestamp
+                self.cond.notify_all()
+            if not ok:
+                time.sleep(0.05)
+
+    def retrieve_at(self, timestamp):
+        """
+        The main-stream frame for a substream timestamp.
+        Returns (frame, main timestamp), or (None, None) if nothing could be read.
+        """
+        target = timestamp + self.offset
+        if not self.reader.live:
+            with self.capture:
+                while self.reader.timestamp is None or self.reader.timestamp < target:
+                    if not self.reader.grab():
+                        break
+                return self._retrieve(target)
+
+        with self.cond:
+            deadline = time.time() + self.max_wait
+            self.targets.append(target)
+            try:
+                while (self.timestamp is None or self.timestamp < target) \
+                        and time.time() < deadline and not self.stopped:
+                    self.cond.wait(deadline - time.time())
+            finally:
+                self.targets.remove(target)
+            # Hold the grab loop off until the frame is decoded
+            self.retrieving += 1
+        try:
+            with self.capture:
+                return self._retrieve(target)
+        finally:
+            with self.cond:
+                self.retrieving -= 1
+                self.cond.notify_all()
+
+    def _retrieve(self, target):
+        """Decode the last grabbed frame; the caller holds the capture lock."""
+        if self.reader.timestamp is None:
+            return None, None
+        ok, frame = self.reader.retrieve()
+        if not ok:
+            return None, None
+        fps = self.reader.get(cv2.CAP_PROP_FPS)
+        if fps > 0 and abs(self.reader.timestamp - target) > 1.0 / fps:
+            self.misaligned += 1
+        return frame, self.reader.timestamp
+
+    def stop(self):
+        with self.cond:
+            self.stopped = True
+            self.cond.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+        self.reader.release()
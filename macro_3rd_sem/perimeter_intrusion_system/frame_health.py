@@ -0,0 +1,73 @@
+# frame_health.py
+"""
+Duplicate-frame detection and stream health.
+
+Flaky RTSP links repeat the last frame, and stalled encoders keep sending
+the same picture. FrameHealthMonitor compares a small grey thumbnail of
+each analyzed frame with the last frame that actually changed; a frame
+where no thumbnail pixel moved by more than the threshold is a duplicate,
+and the caller can reuse the previous detections instead of running the
+detector. The maximum (not mean) difference is used so that one small
+person moving in an otherwise still scene is never taken for a repeat;
+live sensor noise alone is enough to tell a real frame from a resent one.
+
+If frames stay duplicates for freeze_seconds, the stream is reported
+FROZEN. If they stay nearly uniform (lens covered, camera turned to a wall,
+black or grey video) it is reported TAMPER. Both are reported once, and
+RECOVERED follows when the picture comes back.
+"""
+
+import cv2
+import numpy as np
+
+THUMB_SIZE = (160, 90)   # ~8 px cells at 720p, so a distant person still changes a cell
+
+
+class FrameHealthMonitor:
+    def __init__(self, freeze_seconds=10.0, diff_threshold=2, uniform_std=4.0):
+        self.freeze_seconds = freeze_seconds
+        self.diff_threshold = diff_threshold   # max abs grey-level difference of a repeat
+        self.uniform_std = uniform_std         # thumbnail std below this looks covered/blank
+        self.reference = None
+        self.changed_at = None    # time of the last frame that differed from its predecessor
+        self.uniform_since = None
+        self.status = "OK"        # OK, FROZEN or TAMPER
+        self.duplicates = 0
+
+    def fingerprint(self, frame):
+        thumb = cv2.resize(frame, THUMB_SIZE, interpolation=cv2.INTER_AREA)
+        if thumb.ndim == 3:
+            thumb = cv2.cvtColor(thumb, cv2.COLOR_BGR2GRAY)
+        return thumb.astype(np.int16)
+
+    def check(self, frame, now):
+        """Returns (is_duplicate, event) where event is None, FROZEN, TAMPER or RECOVERED."""
+        thumb = self.fingerprint(frame)
+        duplicate = (self.reference is not None
+                     and np.abs(thumb - self.reference).max() <= self.diff_threshold)
+        if duplicate:
+            self.duplicates += 1
+        else:
+            self.reference = thumb
+            self.changed_at = now
+
+        if thumb.std() < self.uniform_std:
+            if self.uniform_since is None:
+                self.uniform_since = now
+        else:
+            self.uniform_since = None
+
+        if self.uniform_since is not None and now - self.uniform_since >= self.freeze_seconds:
+            status = "TAMPER"
+        elif duplicate and now - self.changed_at >= self.freeze_seconds:
+            status = "FROZEN"
+        elif self.uniform_since is None and not duplicate:
+            status = "OK"
+        else:
+            status = self.status   # not long enough yet to change the verdict
+
+        event = None
+        if status != self.status:
+            event = status if status != "OK" else "RECOVERED"
+            self.status = status
+        return duplicate, event
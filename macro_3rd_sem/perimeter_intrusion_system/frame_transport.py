@@ -0,0 +1,175 @@
+# frame_transport.py
+"""
+Shared-memory frame transport between capture and worker processes.
+
+The capture process writes each frame once into a slot of a ring buffer
+held in multiprocessing.shared_memory. Only a small FrameMeta message
+(slot, sequence number, timestamp, shape) goes through a Queue; detector,
+tracker and recorder processes map the slot as a zero-copy numpy view and
+release it when done. A slot is reused only when every consumer released it,
+or, with a lease, once it has been held longer than `lease` seconds: a
+consumer that crashed while holding frames would otherwise keep those slots
+forever and the ring would drop every frame from then on.
+
+    ring = SharedFrameRing.create(slots=8, shape=(1080, 1920, 3), lease=5.0)
+    worker = Process(target=run_worker, args=(ring.handle(), queue))
+    meta = ring.write(frame, consumers=2)      # capture side
+    queue.put(meta)
+
+    ring = SharedFrameRing.attach(handle)      # worker side
+    frame = ring.view(meta)
+    system.process_frame(frame)
+    ring.release(meta)
+
+With a lease, a slow but live consumer can have its slot reclaimed while
+it still reads the view, and the data under it changes. view() only
+catches frames that were overwritten before they were mapped. A consumer
+that may take longer than the lease should use copy(), which checks the
+slot's sequence number again after copying, or call check(meta) once it is
+done with the view. Either raises StaleFrameError if the frame was
+overwritten in the meantime, so torn data is never used silently.
+
+The handle carries the ring's multiprocessing.Lock, so it can only be passed
+to a worker as a Process argument when the worker is started, not sent over
+a Queue or pipe to a process that is already running.
+"""
+
+from collections import namedtuple
+from multiprocessing import Lock, shared_memory
+import time
+import numpy as np
+
+FrameMeta = namedtuple("FrameMeta", ["slot", "seq", "timestamp", "shape"])
+
+# Header columns per slot
+REFCOUNT = 0
+SEQUENCE = 1
+
+
+class StaleFrameError(Exception):
+    """The slot was overwritten before this consumer mapped it."""
+
+
+class SharedFrameRing:
+    def __init__(self, shm, slots, shape, dtype, lock, owner, lease=None):
+        self.shm = shm
+        self.slots = slots
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.lock = lock
+        self.owner = owner
+        self.slot_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        self.header = np.ndarray((slots, 2), dtype=np.int64, buffer=shm.buf)
+        self.data_offset = self.header.nbytes
+        self.next_seq = 1
+        self.next_slot = 0
+        self.dropped = 0
+        self.lease = lease           # seconds a consumer may hold a slot before the writer reclaims it
+        self.written = [0.0] * slots  # writer side: monotonic time each slot was filled
+        self.reclaimed = 0
+
+    @classmethod
+    def create(cls, slots=8, shape=(1080, 1920, 3), dtype=np.uint8, name=None, lease=None):
+        """Allocate a new ring; shape is the largest frame it will carry."""
+        slot_bytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        size = slots * 2 * np.dtype(np.int64).itemsize + slots * slot_bytes
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        ring = cls(shm, slots, shape, dtype, Lock(), owner=True, lease=lease)
+        ring.header[:] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, handle):
+        """Map an existing ring from its creator's handle(), received as a Process argument."""
+        (name, slots, shape, dtype, lock) = handle
+        # Child processes share the creator's resource tracker, so attaching
+        # does not schedule a second unlink; only the creator unlinks.
+        shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, slots, shape, dtype, lock, owner=False)
+
+    def handle(self):
+        """(name, slots, shape, dtype, lock); pass it only as a Process argument (the lock is not picklable)."""
+        return (self.shm.name, self.slots, self.shape, self.dtype.str, self.lock)
+
+    def _slot_array(self, slot, shape):
+        offset = self.data_offset + slot * self.slot_bytes
+        return np.ndarray(shape, dtype=self.dtype, buffer=self.shm.buf, offset=offset)
+
+    def write(self, frame, consumers=1, timestamp=None):
+        """
+        Copy frame into the next free slot, owned by `consumers` readers.
+        Returns its FrameMeta, or None (frame dropped) if every slot is in use;
+        the capture side never waits for slow consumers.
+        """
+        if frame.nbytes > self.slot_bytes or frame.dtype != self.dtype:
+            raise ValueError(f"Frame {frame.shape} {frame.dtype} does not fit ring slots {self.shape} {self.dtype}")
+
+        with self.lock:
+            for i in range(self.slots):
+                slot = (self.next_slot + i) % self.slots
+                if self.header[slot, REFCOUNT] == 0:
+                    break
+            else:
+                slot = self._reclaim()
+                if slot is None:
+                    self.dropped += 1
+                    return None
+            seq = self.next_seq
+            # Mark busy before copying so nobody maps a half-written slot as current
+            self.header[slot, REFCOUNT] = consumers
+            self.header[slot, SEQUENCE] = -seq
+
+        self._slot_array(slot, frame.shape)[...] = frame
+        self.header[slot, SEQUENCE] = seq
+        self.written[slot] = time.monotonic()
+        self.next_seq += 1
+        self.next_slot = (slot + 1) % self.slots
+        return FrameMeta(slot, seq, time.time() if timestamp is None else timestamp, frame.shape)
+
+    def _reclaim(self):
+        """Oldest slot held past the lease (its consumer is presumed dead), or None. Caller holds the lock."""
+        if self.lease is None:
+            return None
+        oldest = min(range(self.slots), key=lambda s: self.written[s])
+        if time.monotonic() - self.written[oldest] < self.lease:
+            return None
+        self.reclaimed += 1
+        print(f"[WARN] Frame ring: slot {oldest} held for over {self.lease:g}s "
+              f"({self.header[oldest, REFCOUNT]} release(s) missing), reclaimed")
+        return oldest
+
+    def view(self, meta):
+        """
+        Zero-copy ndarray for a FrameMeta, valid until release(meta) or, with
+        a lease, until the lease runs out; call check(meta) after using it if
+        that can happen. It is writable: drawing on it (as process_frame does)
+        is visible to every other consumer of the slot.
+        """
+        self.check(meta)
+        return self._slot_array(meta.slot, meta.shape)
+
+    def check(self, meta):
+        """Raise StaleFrameError if the slot no longer holds this frame (e.g. reclaimed after the lease)."""
+        if self.header[meta.slot, SEQUENCE] != meta.seq:
+            raise StaleFrameError(f"Slot {meta.slot} no longer holds frame {meta.seq}")
+
+    def copy(self, meta):
+        """Private copy of the frame, verified intact: the writer marks a slot before overwriting it."""
+        frame = self.view(meta).copy()
+        self.check(meta)
+        return frame
+
+    def release(self, meta):
+        with self.lock:
+            if self.header[meta.slot, SEQUENCE] == meta.seq and self.header[meta.slot, REFCOUNT] > 0:
+                self.header[meta.slot, REFCOUNT] -= 1
+
+    def in_use(self):
+        return int(np.count_nonzero(self.header[:, REFCOUNT]))
+
+    def close(self):
+        # Drop our numpy view of the header before closing the mapping
+        self.header = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,86 @@
+# governor.py
+"""
+Adaptive detection-rate and input-size governor.
+
+Watches how long each processed frame takes (and, where a frame queue
+exists, how deep it is) and walks a ladder of (skip_frames, input_size)
+settings within configured bounds. Under load it first skips more frames,
+then shrinks the detector input; when activity is seen inside or near a
+zone it snaps back to full rate so nothing is missed while it matters.
+"""
+
+# EWMA smoothing factor for latency
+LATENCY_ALPHA = 0.2
+# Fraction of the frame budget under which the governor tries to upgrade
+UPGRADE_HEADROOM = 0.6
+# Consecutive observations required before stepping up or down again
+COOLDOWN_STEPS = 10
+# While there is activity, tolerate running this far over the frame budget
+ACTIVITY_OVERLOAD = 2.0
+
+
+class AdaptiveGovernor:
+    def __init__(self, fps, min_skip=1, max_skip=4, input_sizes=(300, 256, 224),
+                 max_queue=2, activity_hold=30):
+        self.fps = fps if fps > 0 else 30.0
+        self.max_queue = max_queue
+        self.activity_hold = activity_hold
+
+        # Best-quality setting first: drop frames before shrinking the input
+        self.ladder = [(skip, input_sizes[0]) for skip in range(min_skip, max_skip + 1)]
+        self.ladder += [(max_skip, size) for size in input_sizes[1:]]
+        self.level = 0
+        self.latency = None
+        self.steps_since_change = 0
+        self.hold = 0  # processed frames left at full rate after activity
+
+    @property
+    def skip_frames(self):
+        return self.ladder[self.level][0]
+
+    @property
+    def input_size(self):
+        return self.ladder[self.level][1]
+
+    def budget(self):
+        """Seconds available per processed frame at the current skip rate."""
+        return self.skip_frames / self.fps
+
+    def observe(self, latency, queue_depth=0, activity=False):
+        """Record one processed frame and adjust the level. Returns True if it changed."""
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += LATENCY_ALPHA * (latency - self.latency)
+        self.steps_since_change += 1
+
+        if activity:
+            self.hold = self.activity_hold
+        elif self.hold > 0:
+            self.hold -= 1
+
+        old_level = self.level
+        overloaded = self.latency > self.budget() or queue_depth > self.max_queue
+        if self.hold > 0:
+            # Activity near a zone: jump to the best level we can sustain
+            # within ACTIVITY_OVERLOAD times its budget
+            for (level, (skip, _)) in enumerate(self.ladder[:self.level]):
+                if self.latency <= ACTIVITY_OVERLOAD * skip / self.fps:
+                    self.level = level
+                    break
+        elif self.steps_since_change >= COOLDOWN_STEPS:
+            if overloaded and self.level < len(self.ladder) - 1:
+                self.level += 1
+            elif self.level > 0 and queue_depth == 0:
+                skip, _ = self.ladder[self.level - 1]
+                if self.latency < UPGRADE_HEADROOM * skip / self.fps:
+                    self.level -= 1
+
+        if self.level != old_level:
+            self.steps_since_change = 0
+            return True
+        return False
+
+    def status(self):
+        return (f"skip={self.skip_frames} input={self.input_size} "
+                f"latency={0.0 if self.latency is None else self.latency * 1000:.1f}ms")
@@ -0,0 +1,96 @@
+# incidents.py
+"""
+Group alert bursts into incidents.
+
+A person whose track fragments, or a group walking in together, used to
+produce one alert, one snapshot set and one notification per track. The
+IncidentAggregator merges alerts of the same camera and zone that arrive
+within window_seconds of the incident's last alert and within radius
+pixels of one of its participants. The first alert opens the incident (and
+takes the one evidence snapshot), later ones only add participants.
+An incident closes once it has been quiet for window_seconds, and is then
+written as one line of incidents.jsonl with every participant.
+"""
+
+import itertools
+import json
+import time
+
+
+class Incident:
+    def __init__(self, incident_id, camera, zone, t):
+        self.id = incident_id
+        self.camera = camera
+        self.zone = zone
+        self.start = t
+        self.last = t
+        self.participants = {}   # object_id -> {"first": t, "point": (x, y), "alerts": n}
+        self.evidence = []       # snapshot paths of the opening alert
+
+    def near(self, point, radius):
+        return any((p["point"][0] - point[0]) ** 2 + (p["point"][1] - point[1]) ** 2 <= radius ** 2
+                   for p in self.participants.values())
+
+    def add(self, object_id, point, t):
+        entry = self.participants.setdefault(object_id, {"first": t, "alerts": 0})
+        entry["point"] = (int(point[0]), int(point[1]))
+        entry["alerts"] += 1
+        self.last = t
+
+    def record(self):
+        return {
+            "incident": self.id, "camera": self.camera, "zone": self.zone,
+            "start": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.start)),
+            "end": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.last)),
+            "participants": [{"object_id": object_id, "first": round(p["first"] - self.start, 2),
+                              "alerts": p["alerts"]} for (object_id, p) in self.participants.items()],
+            "evidence": self.evidence,
+        }
+
+
+class IncidentAggregator:
+    def __init__(self, window_seconds=30.0, radius=200, log_path="incidents.jsonl"):
+        self.window_seconds = window_seconds
+        self.radius = radius
+        self.log_path = log_path
+        self.open = []                      # open incidents, oldest first
+        self.ids = itertools.count(int(time.time() * 1000))  # unique across restarts
+        self.alerts = 0
+        self.incidents = 0
+
+    def add(self, camera, zone, object_id, point, t=None):
+        """Returns (incident, is_new) for one alert."""
+        t = time.time() if t is None else t
+        self.alerts += 1
+        for incident in reversed(self.open):
+            if (incident.camera == camera and incident.zone == zone
+                    and t - incident.last <= self.window_seconds
+                    and (object_id in incident.participants or incident.near(point, self.radius))):
+                incident.add(object_id, point, t)
+                return incident, False
+        incident = Incident(next(self.ids), camera, zone, t)
+        incident.add(object_id, point, t)
+        self.open.append(incident)
+        self.incidents += 1
+        return incident, True
+
+    def expire(self, t=None):
+        """Close and log incidents quiet for window_seconds. Returns the closed incidents."""
+        t = time.time() if t is None else t
+        closed = [i for i in self.open if t - i.last > self.window_seconds]
+        if closed:
+            self.open = [i for i in self.open if t - i.last <= self.window_seconds]
+            self._log(closed)
+        return closed
+
+    def close_all(self):
+        (closed, self.open) = (self.open, [])
+        self._log(closed)
+        return closed
+
+    def _log(self, incidents):
+        if not incidents:
+            return
+        with open(self.log_path, "a") as f:
+            for incident in incidents:
+                f.write(json.dumps(incident.record()) + "\n")
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Priority scheduler for one detector shared by several cameras.
+
+Each camera thread hands its detection call to run() and blocks until it
+is done; a single worker thread owns the network and executes one call at
+a time. Instead of round-robin, the worker serves:
+
+1. any camera that has fallen behind its guaranteed minimum rate
+   (min_fps), most overdue first, so idle feeds never starve;
+2. otherwise the camera with the highest urgency, which is the time since
+   its last detection times its target rate. The target rate rises from
+   min_fps towards the camera's SLO (max_fps) with its activity: tracks
+   in view, tracks near or heading for a zone, tracks inside a zone.
+
+The worker never idles while a request is waiting, so capacity left over
+after the minimum rates goes to the hot cameras first. report() gives
+each camera's achieved detection rate and queue wait.
+
+Several cameras in one process, sharing one network:
+
+    python inference_scheduler.py --video videos/a.mp4 --video videos/b.mp4 \\
+        --polygon "100,100 500,100 500,400 100,400" --min-fps 1 --max-fps 10 --slo cam0=2:15
+"""
+
+import argparse
+import collections
+import threading
+import time
+import numpy as np
+
+# Camera activity levels, as reported by PerimeterIntrusionSystem.activity_level()
+IDLE = 0        # nobody in view
+TRACKS = 1      # people in view, away from the zones
+NEAR = 2        # a track near a zone or predicted to cross into it
+INSIDE = 3      # a track inside a zone
+ACTIVITY_WEIGHT = (0.0, 0.3, 0.7, 1.0)   # share of (max_fps - min_fps) added to the target rate
+ACTIVITY_NAMES = ("idle", "tracks", "near", "inside")
+RATE_WINDOW = 10.0   # seconds over which the achieved rate is measured
+
+
+class _Request:
+    def __init__(self, fn, args, activity):
+        self.fn = fn
+        self.args = args
+        self.activity = activity
+        self.submitted = time.monotonic()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _Camera:
+    def __init__(self, min_fps, max_fps):
+        self.min_fps = min_fps
+        self.max_fps = max_fps
+        self.last_detection = time.monotonic()
+        self.activity = IDLE
+        self.served = collections.deque()            # completion times within RATE_WINDOW
+        self.waits = collections.deque(maxlen=500)   # recent queue waits in seconds
+        self.total = 0
+
+    def target_fps(self, activity):
+        return self.min_fps + (self.max_fps - self.min_fps) * ACTIVITY_WEIGHT[activity]
+
+
+class InferenceScheduler:
+    def __init__(self, min_fps=1.0, max_fps=10.0):
+        self.min_fps = min_fps
+        self.max_fps = max_fps
+        self.cameras = {}
+        self.pending = {}    # camera -> its one outstanding request (run() blocks)
+        self.busy_time = 0.0
+        self.started = time.monotonic()
+        self._cond = threading.Condition()
+        self._stop = False
+        self.thread = None
+
+    def add_camera(self, camera, min_fps=None, max_fps=None):
+        """Register a camera with its own minimum rate and SLO (defaults: the scheduler's)."""
+        with self._cond:
+            self.cameras[camera] = _Camera(self.min_fps if min_fps is None else min_fps,
+                                           self.max_fps if max_fps is None else max_fps)
+
+    def start(self):
+        self.thread = threading.Thread(target=self._work, name="inference", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        if self.thread is not None:
+            self.thread.join()
+
+    def run(self, camera, fn, *args, activity=IDLE):
+        """Execute fn(*args) on the inference thread when camera's turn comes; returns its result."""
+        request = _Request(fn, args, activity)
+        with self._cond:
+            if camera not in self.cameras:
+                self.cameras[camera] = _Camera(self.min_fps, self.max_fps)
+            self.cameras[camera].activity = activity
+            self.pending[camera] = request
+            self._cond.notify()
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _pick(self, now):
+        """Camera to serve next: overdue minimum rates first, then the most urgent."""
+        best, best_key = None, None
+        for (camera, request) in self.pending.items():
+            state = self.cameras[camera]
+            waited = now - state.last_detection
+            overdue = waited * state.min_fps - 1.0   # > 0 once the minimum rate is missed
+            urgency = waited * state.target_fps(request.activity)
+            key = (overdue > 0, overdue if overdue > 0 else urgency)
+            if best_key is None or key > best_key:
+                best, best_key = camera, key
+        return best
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self.pending and not self._stop:
+                    self._cond.wait()
+                if self._stop:
+                    return
+                now = time.monotonic()
+                camera = self._pick(now)
+                request = self.pending.pop(camera)
+                state = self.cameras[camera]
+            start = time.monotonic()
+            try:
+                request.result = request.fn(*request.args)
+            except Exception as e:
+                request.error = e
+            end = time.monotonic()
+            self.busy_time += end - start
+            state.last_detection = end
+            state.waits.append(start - request.submitted)
+            state.served.append(end)
+            state.total += 1
+            request.done.set()
+
+    def stats(self):
+        """{camera: {"fps", "target_fps", "activity", "wait_ms", "p95_wait_ms", "detections"}}"""
+        now = time.monotonic()
+        window = min(RATE_WINDOW, max(now - self.started, 1e-9))
+        out = {}
+        with self._cond:
+            for (camera, state) in self.cameras.items():
+                while state.served and state.served[0] < now - RATE_WINDOW:
+                    state.served.popleft()
+                waits = np.array(state.waits) if state.waits else np.zeros(1)
+                out[camera] = {
+                    "fps": len(state.served) / window,
+                    "target_fps": state.target_fps(state.activity),
+                    "activity": ACTIVITY_NAMES[state.activity],
+                    "wait_ms": float(waits.mean() * 1000),
+                    "p95_wait_ms": float(np.percentile(waits, 95) * 1000),
+                    "detections": state.total,
+                }
+        return out
+
+    def report(self):
+        lines = [f"[INFO] Inference: {self.busy_time / max(time.monotonic() - self.started, 1e-9):.0%} busy"]
+        for (camera, s) in sorted(self.stats().items()):
+            lines.append(f"[INFO]   {camera:<10}{s['activity']:<8}{s['fps']:6.1f} det/s "
+                         f"(target {s['target_fps']:.1f}), wait {s['wait_ms']:6.1f} ms "
+                         f"(p95 {s['p95_wait_ms']:.1f}), {s['detections']} total")
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Several cameras sharing one detector through the scheduler")
+    parser.add_argument("--video", action="append", required=True, help="Camera source (repeat per camera)")
+    parser.add_argument("--polygon", type=str, required=True, help="Perimeter 'x1,y1 x2,y2 ...' for every camera")
+    parser.add_argument("--min-fps", type=float, default=1.0, help="Guaranteed detections/s per camera")
+    parser.add_argument("--max-fps", type=float, default=10.0, help="Detections/s SLO for a camera with activity")
+    parser.add_argument("--slo", action="append", default=[],
+                        help="Per-camera rates as camN=MIN:MAX, e.g. cam0=2:15 for a gate camera (repeatable)")
+    parser.add_argument("--report", type=float, default=10.0, help="Seconds between scheduler reports")
+    args = parser.parse_args()
+
+    from main import PerimeterIntrusionSystem, SNAPSHOT_BUDGET_MB
+    from snapshot_store import SnapshotStore
+
+    scheduler = InferenceScheduler(args.min_fps, args.max_fps)
+    polygon = [tuple(int(v) for v in p.split(",")) for p in args.polygon.split()]
+    slos = {}
+    for item in args.slo:
+        (camera, _, rates) = item.partition("=")
+        slos[camera] = tuple(float(v) for v in rates.split(":"))
+    # One store for all cameras: a single index and one disk budget for the process
+    snapshots = SnapshotStore("snapshots", budget_bytes=SNAPSHOT_BUDGET_MB * 1024 * 1024)
+    systems = []
+    for (i, source) in enumerate(args.video):
+        system = PerimeterIntrusionSystem(0 if source == "0" else source, camera_id=f"cam{i}", headless=True,
+                                          snapshots=snapshots, scheduler=scheduler)
+        system.polygon = list(polygon)
+        scheduler.add_camera(system.camera_id, *slos.get(system.camera_id, ()))
+        systems.append(system)
+    scheduler.start()
+    threads = [threading.Thread(target=s.run, name=s.camera_id, daemon=True) for s in systems]
+    for thread in threads:
+        thread.start()
+    try:
+        while any(t.is_alive() for t in threads):
+            for thread in threads:
+                thread.join(timeout=args.report / len(threads))
+            print(scheduler.report())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scheduler.stop()
+        snapshots.close()
+        print(scheduler.report())
@@ -0,0 +1,248 @@
+# kalman_tracker.py
+"""
+SORT-style box tracker with a constant-velocity Kalman filter per track.
+
+Unlike CentroidTracker, every track keeps its box, velocity and covariance,
+and each update reports which detection was assigned to which track, so the
+caller can draw and snapshot the real box instead of guessing.
+"""
+
+from collections import OrderedDict
+import numpy as np
+from track_registry import allocate_id
+
+# Weight of the normalized centroid distance in the association cost
+DISTANCE_WEIGHT = 0.5
+
+
+def box_to_anchor(box):
+    """Anchor point used for zone tests (centre, shifted towards the feet)."""
+    (startX, startY, endX, endY) = box
+    cX = int((startX + endX) / 2.0)
+    cY = int((startY + endY) / 2.0 + (endY - startY) * 0.2)
+    return np.array([cX, cY], dtype="int")
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """Pairwise IoU between two (N, 4) and (M, 4) arrays of x1, y1, x2, y2."""
+    a = boxes_a[:, None, :]
+    b = boxes_b[None, :, :]
+    iw = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    ih = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = iw * ih
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    union = area_a + area_b - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+
+class KalmanBoxTrack:
+    """Kalman state [cx, cy, w, h, vx, vy, vw, vh] for one tracked box."""
+
+    # Shared model matrices (one time step == one tracker update)
+    F = np.eye(8)
+    F[:4, 4:] = np.eye(4)
+    H = np.eye(4, 8)
+    Q = np.diag([1.0, 1.0, 1.0, 1.0, 0.5, 0.5, 0.05, 0.05])
+    R = np.diag([4.0, 4.0, 16.0, 16.0])
+
+    def __init__(self, box):
+        (startX, startY, endX, endY) = box
+        self.x = np.array([(startX + endX) / 2.0, (startY + endY) / 2.0,
+                           float(endX - startX), float(endY - startY),
+                           0.0, 0.0, 0.0, 0.0])
+        self.P = np.diag([10.0, 10.0, 10.0, 10.0, 100.0, 100.0, 10.0, 10.0])
+        self.hits = 1
+
+    def predict(self):
+        self.x = self.F @ self.x
+        self.x[2:4] = np.maximum(self.x[2:4], 1.0)
+        self.P = self.F @ self.P @ self.F.T + self.Q
+
+    def correct(self, box):
+        (startX, startY, endX, endY) = box
+        z = np.array([(startX + endX) / 2.0, (startY + endY) / 2.0,
+                      float(endX - startX), float(endY - startY)])
+        y = z - self.H @ self.x
+        S = self.H @ self.P @ self.H.T + self.R
+        K = self.P @ self.H.T @ np.linalg.inv(S)
+        self.x = self.x + K @ y
+        self.P = (np.eye(8) - K @ self.H) @ self.P
+        self.hits += 1
+
+    def box(self):
+        (cx, cy, w, h) = self.x[:4]
+        return (int(cx - w / 2.0), int(cy - h / 2.0), int(cx + w / 2.0), int(cy + h / 2.0))
+
+    def velocity(self):
+        """Anchor velocity in pixels per update."""
+        return self.x[4:6].copy()
+
+
+class KalmanTracker:
+    def __init__(self, max_disappeared=30, max_distance=150, registry=None):
+        self.nextObjectID = 0
+        self.registry = registry          # track_registry.TrackRegistry pruned on deregister
+        self.objects = OrderedDict()      # object_id -> anchor point (same as CentroidTracker)
+        self.tracks = OrderedDict()       # object_id -> KalmanBoxTrack
+        self.disappeared = OrderedDict()
+        self.states = {}                  # For storing INSIDE/OUTSIDE states
+        self.matches = {}                 # object_id -> index into the last rects list
+        self.max_disappeared = max_disappeared
+        self.max_distance = max_distance
+
+    def register(self, box):
+        (objectID, self.nextObjectID) = allocate_id(self.nextObjectID, self.tracks)
+        track = KalmanBoxTrack(box)
+        self.tracks[objectID] = track
+        self.objects[objectID] = box_to_anchor(track.box())
+        self.disappeared[objectID] = 0
+        self.states[objectID] = "OUTSIDE"
+        return objectID
+
+    def deregister(self, objectID):
+        del self.tracks[objectID]
+        del self.objects[objectID]
+        del self.disappeared[objectID]
+        if objectID in self.states:
+            del self.states[objectID]
+        if self.registry is not None:
+            self.registry.on_deregister(objectID)
+
+    def _mark_missing(self, objectID):
+        self.disappeared[objectID] += 1
+        if self.disappeared[objectID] > self.max_disappeared:
+            self.deregister(objectID)
+
+    def update(self, rects):
+        self.matches = {}
+        for track in self.tracks.values():
+            track.predict()
+
+        objectIDs = list(self.tracks.keys())
+        if len(rects) == 0:
+            for objectID in objectIDs:
+                self._mark_missing(objectID)
+            self._refresh_objects()
+            return self.objects
+
+        detections = np.array(rects, dtype="float")
+        if len(objectIDs) == 0:
+            for i in range(len(rects)):
+                self.matches[self.register(rects[i])] = i
+            return self.objects
+
+        predicted = np.array([self.tracks[i].box() for i in objectIDs], dtype="float")
+        cost = self._association_cost(predicted, detections)
+
+        # Greedy assignment on ascending cost, gated by max_distance / IoU
+        usedRows, usedCols = set(), set()
+        order = np.argsort(cost, axis=None, kind="stable")
+        for flat in order:
+            if not np.isfinite(cost.flat[flat]):
+                break
+            row, col = divmod(int(flat), cost.shape[1])
+            if row in usedRows or col in usedCols:
+                continue
+            objectID = objectIDs[row]
+            self.tracks[objectID].correct(rects[col])
+            self.disappeared[objectID] = 0
+            self.matches[objectID] = col
+            usedRows.add(row)
+            usedCols.add(col)
+
+        for row in set(range(len(objectIDs))).difference(usedRows):
+            self._mark_missing(objectIDs[row])
+        for col in sorted(set(range(len(rects))).difference(usedCols)):
+            self.matches[self.register(rects[col])] = col
+
+        self._refresh_objects()
+        return self.objects
+
+    def _association_cost(self, predicted, detections):
+        iou = iou_matrix(predicted, detections)
+        pc = (predicted[:, None, :2] + predicted[:, None, 2:]) / 2.0
+        dc = (detections[None, :, :2] + detections[None, :, 2:]) / 2.0
+        D = np.sqrt(((pc - dc) ** 2).sum(axis=2))
+        cost = (1.0 - iou) + DISTANCE_WEIGHT * D / float(self.max_distance)
+        cost[(iou <= 0) & (D > self.max_distance)] = np.inf
+        return cost
+
+    def _refresh_objects(self):
+        for objectID, track in self.tracks.items():
+            self.objects[objectID] = box_to_anchor(track.box())
+
+    def get_box(self, objectID, rects=None):
+        """Matched detection box if this update had one, else the predicted box."""
+        if rects is not None and objectID in self.matches:
+            return tuple(int(v) for v in rects[self.matches[objectID]])
+        return self.tracks[objectID].box()
+
+    def get_velocity(self, objectID):
+        return self.tracks[objectID].velocity()
+
+    def get_covariance(self, objectID):
+        return self.tracks[objectID].P.copy()
+
+    def predict_crossing(self, objectID, polygon, horizon=None):
+        """
+        Updates until the anchor's straight-line path meets the polygon boundary,
+        or None if it is not heading towards any edge (within horizon, if given).
+        """
+        if len(polygon) < 3 or objectID not in self.tracks:
+            return None
+        p = self.objects[objectID].astype("float")
+        v = self.get_velocity(objectID)
+        if not np.any(v):
+            return None
+        pts = np.asarray(polygon, dtype="float")
+        a = pts
+        e = np.roll(pts, -1, axis=0) - pts
+        # Solve p + t*v = a + s*e for every edge at once
+        denom = v[0] * e[:, 1] - v[1] * e[:, 0]
+        diff = a - p
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = (diff[:, 0] * e[:, 1] - diff[:, 1] * e[:, 0]) / denom
+            s = (diff[:, 0] * v[1] - diff[:, 1] * v[0]) / denom
+        valid = (denom != 0) & (t > 0) & (s >= 0) & (s <= 1)
+        if not np.any(valid):
+            return None
+        steps = float(t[valid].min())
+        if horizon is not None and steps > horizon:
+            return None
+        return steps
+
+    def get_arrays(self):
+        """All track state as flat arrays (for checkpointing)."""
+        ids = list(self.tracks.keys())
+        return {
+            "ids": np.array(ids, dtype=np.int64),
+            "x": np.array([self.tracks[i].x for i in ids], dtype=np.float32).reshape(-1, 8),
+            "P": np.array([self.tracks[i].P for i in ids], dtype=np.float32).reshape(-1, 8, 8),
+            "hits": np.array([self.tracks[i].hits for i in ids], dtype=np.int32),
+            "disappeared": np.array([self.disappeared[i] for i in ids], dtype=np.int32),
+            "inside": np.array([self.states.get(i) == "INSIDE" for i in ids], dtype=bool),
+            "next_id": np.array(self.nextObjectID, dtype=np.int64),
+        }
+
+    def set_arrays(self, arrays):
+        """Replace all tracks with those from get_arrays()."""
+        for objectID in list(self.tracks.keys()):
+            self.deregister(objectID)
+        for (i, objectID) in enumerate(arrays["ids"].tolist()):
+            track = KalmanBoxTrack((0, 0, 1, 1))
+            track.x = arrays["x"][i].astype("float")
+            track.P = arrays["P"][i].astype("float")
+            track.hits = int(arrays["hits"][i])
+            self.tracks[objectID] = track
+            self.objects[objectID] = box_to_anchor(track.box())
+            self.disappeared[objectID] = int(arrays["disappeared"][i])
+            self.states[objectID] = "INSIDE" if arrays["inside"][i] else "OUTSIDE"
+        self.nextObjectID = int(arrays["next_id"])
+        self.matches = {}
+
+    def update_state(self, objectID, new_state):
+        self.states[objectID] = new_state
+
+    def get_states(self):
+        return self.states
@@ -0,0 +1,283 @@
+# live_view.py
+"""
+Encode-once live view server (MJPEG and WebSocket) for annotated frames.
+
+The detection loop only hands over a reference to the latest annotated
+frame with publish(). A per-stream encoder on the server's asyncio thread
+JPEG-encodes it at most `fps` times per second, at most `width` pixels
+wide, and only while somebody is watching; every client of the stream is
+sent the same bytes. Slow clients simply skip to the newest frame, so they
+never push back on detection.
+
+    GET /                      list of streams
+    GET /stream/<name>.mjpg    multipart MJPEG
+    GET /ws/<name>             WebSocket, one binary JPEG message per frame
+    GET /snapshot/<name>.jpg   latest frame
+    GET /admin/<action>?k=v    registered admin action (loopback clients only),
+                               e.g. /admin/profile?seconds=30; an action raises
+                               ValueError for bad parameters (400)
+"""
+
+import asyncio
+import base64
+import hashlib
+import ipaddress
+import struct
+import threading
+import time
+import urllib.parse
+import cv2
+
+WS_MAGIC = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+BOUNDARY = b"frame"
+SNAPSHOT_TIMEOUT = 5.0   # seconds to wait for a frame when nobody is watching the stream
+SNAPSHOT_MAX_AGE = 2.0   # an encoded frame older than this is not served as a snapshot
+
+
+class _Stream:
+    def __init__(self):
+        self.frame = None        # latest published frame (not yet encoded)
+        self.jpeg = None         # latest encoded frame shared by all clients
+        self.seq = 0
+        self.clients = 0
+        self.last_encode = 0.0
+        self.new_frame = None    # asyncio.Event, created on the server loop
+        self.encoded = None      # asyncio.Condition, created on the server loop
+        self.encoder = None
+
+
+class LiveViewServer:
+    def __init__(self, host="0.0.0.0", port=8080, fps=5.0, width=640, quality=70):
+        self.host = host
+        self.port = port
+        self.interval = 1.0 / fps if fps > 0 else 0.0
+        self.width = width
+        self.quality = quality
+        self.streams = {}
+        self.loop = None
+        self.thread = None
+        self.frames_encoded = 0
+        self.admin = {}          # action name -> callable(params dict) returning a text reply
+        self._started = threading.Event()
+
+    # ---- detection-loop side ----
+
+    def start(self):
+        self.thread = threading.Thread(target=self._serve, name="live-view", daemon=True)
+        self.thread.start()
+        self._started.wait()
+        print(f"[INFO] Live view on http://{self.host}:{self.port}/")
+
+    def publish(self, name, frame):
+        """Offer the latest annotated frame of a stream. Costs nothing when nobody watches."""
+        stream = self.streams.get(name)
+        if stream is None:
+            self.loop.call_soon_threadsafe(self._add_stream, name)
+            return
+        if stream.clients == 0:
+            return
+        stream.frame = frame
+        self.loop.call_soon_threadsafe(stream.new_frame.set)
+
+    def stop(self):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+
+    # ---- server side ----
+
+    def _serve(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        server = self.loop.run_until_complete(
+            asyncio.start_server(self._handle, self.host, self.port))
+        self._started.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            server.close()
+            tasks = asyncio.all_tasks(self.loop)
+            for task in tasks:
+                task.cancel()
+            self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self.loop.close()
+
+    def _add_stream(self, name):
+        if name not in self.streams:
+            stream = _Stream()
+            stream.new_frame = asyncio.Event()
+            stream.encoded = asyncio.Condition()
+            stream.encoder = self.loop.create_task(self._encode_loop(stream))
+            self.streams[name] = stream
+        return self.streams[name]
+
+    def _encode(self, frame):
+        (h, w) = frame.shape[:2]
+        if self.width and w > self.width:
+            frame = cv2.resize(frame, (self.width, int(h * self.width / w)), interpolation=cv2.INTER_AREA)
+        ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        return buf.tobytes() if ok else None
+
+    async def _encode_loop(self, stream):
+        while True:
+            await stream.new_frame.wait()
+            stream.new_frame.clear()
+            wait = stream.last_encode + self.interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            frame, stream.frame = stream.frame, None
+            if frame is None or stream.clients == 0:
+                continue
+            stream.last_encode = time.monotonic()
+            # Encode off the event loop so client I/O keeps flowing
+            jpeg = await self.loop.run_in_executor(None, self._encode, frame)
+            if jpeg is None:
+                continue
+            self.frames_encoded += 1
+            async with stream.encoded:
+                stream.jpeg = jpeg
+                stream.seq += 1
+                stream.encoded.notify_all()
+
+    async def _next_jpeg(self, stream, last_seq):
+        """Newest encoded frame after last_seq; intermediate frames are skipped."""
+        async with stream.encoded:
+            await stream.encoded.wait_for(lambda: stream.seq != last_seq)
+            return stream.jpeg, stream.seq
+
+    async def _handle(self, reader, writer):
+        try:
+            request = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            writer.close()
+            return
+        lines = request.decode("latin-1").split("\r\n")
+        parts = lines[0].split(" ")
+        path = parts[1] if len(parts) > 1 else "/"
+        (path, _, query) = path.partition("?")
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                (k, v) = line.split(":", 1)
+                headers[k.strip().lower()] = v.strip()
+
+        try:
+            if path.startswith("/stream/") and path.endswith(".mjpg"):
+                await self._serve_mjpeg(path[len("/stream/"):-len(".mjpg")], writer)
+            elif path.startswith("/ws/") and headers.get("upgrade", "").lower() == "websocket":
+                await self._serve_websocket(path[len("/ws/"):], headers, reader, writer)
+            elif path.startswith("/snapshot/") and path.endswith(".jpg"):
+                await self._serve_snapshot(path[len("/snapshot/"):-len(".jpg")], writer)
+            elif path.startswith("/admin/"):
+                self._serve_admin(path[len("/admin/"):], query, writer)
+            elif path == "/":
+                links = "".join(f'<li><a href="/stream/{n}.mjpg">{n}</a></li>' for n in sorted(self.streams))
+                self._respond(writer, "200 OK", "text/html", f"<h1>Live view</h1><ul>{links}</ul>".encode())
+            else:
+                self._respond(writer, "404 Not Found", "text/plain", b"not found")
+            await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    def _serve_admin(self, action, query, writer):
+        peer = writer.get_extra_info("peername")
+        handler = self.admin.get(action)
+        if handler is None:
+            self._respond(writer, "404 Not Found", "text/plain", b"not found")
+        elif peer is None or not ipaddress.ip_address(peer[0]).is_loopback:
+            self._respond(writer, "403 Forbidden", "text/plain", b"admin actions are local only")
+        else:
+            try:
+                reply = handler(dict(urllib.parse.parse_qsl(query)))
+            except ValueError as e:
+                self._respond(writer, "400 Bad Request", "text/plain", f"{e}\n".encode())
+                return
+            self._respond(writer, "200 OK", "text/plain", (reply + "\n").encode())
+
+    def _respond(self, writer, status, content_type, body):
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+
+    async def _watch(self, stream, send):
+        """Register a viewer and feed it encoded frames until it disconnects."""
+        stream.clients += 1
+        try:
+            seq = 0
+            while True:
+                (jpeg, seq) = await self._next_jpeg(stream, seq)
+                await send(jpeg)
+        finally:
+            stream.clients -= 1
+
+    def _known_stream(self, name, writer):
+        """The published stream called name, or None after answering 404 (typos and scans create nothing)."""
+        stream = self.streams.get(name)
+        if stream is None:
+            self._respond(writer, "404 Not Found", "text/plain", b"no such stream")
+        return stream
+
+    async def _serve_mjpeg(self, name, writer):
+        stream = self._known_stream(name, writer)
+        if stream is None:
+            return
+        writer.write(b"HTTP/1.1 200 OK\r\nCache-Control: no-cache\r\nConnection: close\r\n"
+                     b"Content-Type: multipart/x-mixed-replace; boundary=" + BOUNDARY + b"\r\n\r\n")
+
+        async def send(jpeg):
+            writer.write(b"--" + BOUNDARY + b"\r\nContent-Type: image/jpeg\r\nContent-Length: "
+                         + str(len(jpeg)).encode() + b"\r\n\r\n" + jpeg + b"\r\n")
+            await writer.drain()
+        await self._watch(stream, send)
+
+    async def _serve_websocket(self, name, headers, reader, writer):
+        stream = self._known_stream(name, writer)
+        if stream is None:
+            return
+        key = headers.get("sec-websocket-key", "").encode()
+        accept = base64.b64encode(hashlib.sha1(key + WS_MAGIC).digest())
+        writer.write(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n"
+                     b"Connection: Upgrade\r\nSec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+
+        async def send(jpeg):
+            n = len(jpeg)
+            if n < 126:
+                header = struct.pack("!BB", 0x82, n)
+            elif n < 65536:
+                header = struct.pack("!BBH", 0x82, 126, n)
+            else:
+                header = struct.pack("!BBQ", 0x82, 127, n)
+            writer.write(header + jpeg)
+            await writer.drain()
+
+        watcher = self.loop.create_task(self._watch(stream, send))
+        # Incoming messages are ignored; EOF or a close frame ends the session
+        try:
+            while True:
+                data = await reader.read(4096)
+                if not data or data[0] & 0x0F == 0x8:
+                    break
+        finally:
+            watcher.cancel()
+
+    async def _serve_snapshot(self, name, writer):
+        stream = self._known_stream(name, writer)
+        if stream is None:
+            return
+        if stream.jpeg is None or time.monotonic() - stream.last_encode > SNAPSHOT_MAX_AGE:
+            # Nobody is watching, so the stored frame is missing or old: watch for a fresh one
+            try:
+                (jpeg, _) = await asyncio.wait_for(self._one_frame(stream), timeout=SNAPSHOT_TIMEOUT)
+            except asyncio.TimeoutError:
+                self._respond(writer, "503 Service Unavailable", "text/plain", b"no frame from camera")
+                return
+        else:
+            jpeg = stream.jpeg
+        self._respond(writer, "200 OK", "image/jpeg", jpeg)
+
+    async def _one_frame(self, stream):
+        stream.clients += 1
+        try:
+            return await self._next_jpeg(stream, stream.seq)
+        finally:
+            stream.clients -= 1
@@ -7,46 +7,131 @@ Detects objects entering a polygonal perimeter drawn by the user.
 When intrusion occurs, saves snapshot + logs the event.
 """
 
+import time
+STARTUP_T0 = time.perf_counter()  # taken before the heavy imports, for --startup-profile
+
 import cv2
 import numpy as np
 import argparse
 import os
-import time
-from centroid_tracker import CentroidTracker
+import model_cache
+import inference_scheduler
+from kalman_tracker import KalmanTracker, box_to_anchor
+from track_registry import TrackRegistry
+from tripwire import TripwireEngine, PERIMETER, DIR_IN
+from governor import AdaptiveGovernor
+from video_reader import StrideVideoReader
+from snapshot_store import SnapshotStore
+from frame_health import FrameHealthMonitor
+from sampling_profiler import set_stage
+STARTUP_IMPORTS = time.perf_counter()
 
 # ============ PARAMETERS ============
 CONFIDENCE_THRESHOLD = 0.3
-SKIP_FRAMES = 1
+SKIP_FRAMES = 1        # Detection interval at full rate
+MAX_SKIP_FRAMES = 4    # Largest interval the load governor may fall back to
+INPUT_SIZES = (300, 256, 224)  # Detector input sizes, best first
 DEBOUNCE_FRAMES = 1
+SNAPSHOT_BUDGET_MB = 500  # Oldest snapshots are deleted beyond this
+PREALERT_SECONDS = 2.0  # Warn when a track is predicted to cross within this time
+INCIDENT_WINDOW = 30.0  # Alerts this close in time (and space) share one incident
+FREEZE_SECONDS = 10.0   # Report the camera frozen/tampered after this long without a changed frame
+NEAR_ZONE_PX = 50       # Tracks this close to the perimeter raise the camera's inference priority
 
 # ====================================
 
 class PerimeterIntrusionSystem:
-    def __init__(self, video_source):
+    def __init__(self, video_source, adaptive=True, camera_id="cam0", headless=False, live_view=None,
+                 notifier=None, snapshots=None, startup_profile=False, zone_watcher=None, evidence=None,
+                 suppressor=None, trajectories=None, checkpointer=None, incidents=None, cpu_budget=None,
+                 detector_profile=None, occupancy=None, scheduler=None):
+        self.startup_profile = startup_profile
+        self.startup_marks = {"imports": STARTUP_IMPORTS - STARTUP_T0}
         self.video_source = video_source
-        self.vs = cv2.VideoCapture(video_source)
-        self.tracker = CentroidTracker()
+        self.camera_id = camera_id
+        self.headless = headless      # no desktop window; the perimeter must be given up front
+        self.live_view = live_view    # live_view.LiveViewServer, or None
+        self.notifier = notifier      # notifier.AlertNotifier, or None
+        self.cpu_budget = cpu_budget  # cpu_budget.BudgetClient, or None (OpenCV uses every core)
+        self.detector_profile = detector_profile  # from detector_tuner.load_profile(), or None
+        input_sizes = detector_profile["input_sizes"] if detector_profile else INPUT_SIZES
+        self.input_scale = detector_profile["scale"] if detector_profile else 0.007843
+        self.input_mean = detector_profile["mean"] if detector_profile else 127.5
+        if cpu_budget is not None:
+            cpu_budget.join()
+        self.evidence = evidence      # dual_stream.EvidenceStream (main stream for snapshots), or None
+        self.suppressor = suppressor  # static_suppression.StaticSuppressor, or None
+        self.trajectories = trajectories  # trajectory_store.TrajectoryStore, or None
+        self.occupancy = occupancy        # occupancy.OccupancyAccumulator, or None
+        self.scheduler = scheduler        # inference_scheduler.InferenceScheduler shared across cameras, or None
+        self.checkpointer = checkpointer  # checkpoint.Checkpointer, or None
+        self.incidents = incidents        # incidents.IncidentAggregator, or None for one alert per track
+        self.health = FrameHealthMonitor(FREEZE_SECONDS)
+        self.last_rects = []          # detections of the last analyzed frame, reused for duplicates
+        self.vs = StrideVideoReader(video_source)
+        self.mark_startup("source opened")
+        self.registry = TrackRegistry()  # per-track side tables, pruned with the tracker
+        self.tracker = KalmanTracker(registry=self.registry)
+        fps = self.vs.get(cv2.CAP_PROP_FPS)
+        self.fps = fps if fps > 0 else 30.0
+        if adaptive:
+            self.governor = AdaptiveGovernor(self.fps, SKIP_FRAMES, MAX_SKIP_FRAMES, input_sizes)
+        else:
+            self.governor = AdaptiveGovernor(self.fps, SKIP_FRAMES, SKIP_FRAMES, input_sizes[:1])
         self.polygon = []
+        self.tripwires = []  # tripwire.Tripwire lines checked alongside the perimeter
+        self.zone_engine = None
+        self.zone_mask = None          # precomputed inside mask for the current zones, if known
+        self.zone_watcher = zone_watcher  # zone_config.ZoneWatcher, or None
+        self.last_points = {}  # object_id -> anchor point at the previous processed frame
         self.drawing = False
         self.frame_count = 0
         self.alert_count = 0
         self.log_file = "alerts_log.txt"
-        os.makedirs("snapshots", exist_ok=True)
+        if snapshots is None:
+            snapshots = SnapshotStore("snapshots", budget_bytes=SNAPSHOT_BUDGET_MB * 1024 * 1024)
+        self.snapshots = snapshots
         self.load_mobilenet_ssd()
-        self.state_change_frames = {}  # object_id -> frames since last state change
+        self.mark_startup("model loaded")
+        self.state_change_frames = self.registry.table("state_change_frames")  # object_id -> frames since last state change
+        self.prealerted = self.registry.set("prealerted")  # object_ids already warned about an upcoming crossing
+        self.origins = self.registry.table("origins")  # object_id -> anchor point where the track first appeared
+        if zone_watcher is not None:
+            self.apply_zones(zone_watcher.load_now())
+            zone_watcher.start()
+        if checkpointer is not None:
+            self.restore_checkpoint()
 
     def load_mobilenet_ssd(self):
         print("[INFO] Loading MobileNet-SSD model...")
         base_dir = os.path.dirname(os.path.abspath(__file__))
         prototxt_path = os.path.join(base_dir, "models", "MobileNetSSD_deploy.prototxt")
         caffemodel_path = os.path.join(base_dir, "models", "MobileNetSSD_deploy.caffemodel")
-        self.net = cv2.dnn.readNetFromCaffe(prototxt_path, caffemodel_path)
+        if self.detector_profile is not None:
+            # Variant and input size tuned for this camera by detector_tuner.py
+            from detector_tuner import load_variant
+            self.net = load_variant(self.detector_profile["model"])
+            print(f"[INFO] Detector profile: {self.detector_profile['variant']} at "
+                  f"{self.detector_profile['input_sizes'][0]}")
+        else:
+            # Parsed once per process (see model_cache.py)
+            self.net = model_cache.load_net(prototxt_path, caffemodel_path)
         self.CLASSES = ["background", "aeroplane", "bicycle", "bird", "boat",
                         "bottle", "bus", "car", "cat", "chair", "cow", "diningtable",
                         "dog", "horse", "motorbike", "person", "pottedplant", "sheep",
                         "sofa", "train", "tvmonitor"]
         print("[INFO] Model loaded successfully.")
 
+    def mark_startup(self, name):
+        """Record the first time a startup milestone is reached (seconds since main.py started)."""
+        if name in self.startup_marks:
+            return
+        self.startup_marks[name] = time.perf_counter() - STARTUP_T0
+        if name == "first detection" and self.startup_profile:
+            print("[STARTUP] Time since main.py started:")
+            for (mark, seconds) in sorted(self.startup_marks.items(), key=lambda kv: kv[1]):
+                print(f"[STARTUP]   {mark:<16} {seconds * 1000:8.1f} ms")
+
     # Polygon drawing
     def draw_perimeter(self, event, x, y, flags, param):
         if event == cv2.EVENT_LBUTTONDOWN:
@@ -59,8 +144,10 @@ class PerimeterIntrusionSystem:
 
     def detect_objects(self, frame):
         (h, w) = frame.shape[:2]
-        blob = cv2.dnn.blobFromImage(cv2.resize(frame, (300, 300)), 0.007843,
-                                     (300, 300), 127.5)
+        size = self.governor.input_size
+        if isinstance(size, int):
+            size = (size, size)
+        blob = cv2.dnn.blobFromImage(cv2.resize(frame, size), self.input_scale, size, self.input_mean)
         self.net.setInput(blob)
         detections = self.net.forward()
 
@@ -80,42 +167,230 @@ class PerimeterIntrusionSystem:
         if len(self.polygon) < 3:
             return False
         pt = (int(point[0]), int(point[1]))  # Ensure tuple of ints
+        if self.zone_mask is not None:
+            (h, w) = self.zone_mask.shape
+            if 0 <= pt[0] < w and 0 <= pt[1] < h:
+                return bool(self.zone_mask[pt[1], pt[0]])
         result = cv2.pointPolygonTest(np.array(self.polygon, np.int32), pt, False)
         return result >= 0  # True if inside or on boundary
 
+    def suppression_tracks(self):
+        """[(box, inside, pixels travelled since the track appeared)] for the static suppressor."""
+        tracks = []
+        for (object_id, point) in self.tracker.objects.items():
+            origin = self.origins.get(object_id, point)
+            tracks.append((self.tracker.get_box(object_id), self.tracker.states.get(object_id) == "INSIDE",
+                           float(np.hypot(*(point - origin)))))
+        return tracks
+
+    def activity_level(self):
+        """Inference priority of this camera: idle, tracks in view, tracks near the zone, tracks inside."""
+        states = self.tracker.get_states()
+        if any(s == "INSIDE" for s in states.values()):
+            return inference_scheduler.INSIDE
+        if self.prealerted:
+            return inference_scheduler.NEAR
+        if not self.tracker.objects:
+            return inference_scheduler.IDLE
+        if len(self.polygon) >= 3:
+            contour = np.array(self.polygon, np.int32)
+            for point in self.tracker.objects.values():
+                pt = (float(point[0]), float(point[1]))
+                if cv2.pointPolygonTest(contour, pt, True) >= -NEAR_ZONE_PX:
+                    return inference_scheduler.NEAR
+        return inference_scheduler.TRACKS
+
+    def get_zone_engine(self):
+        # Rebuild the precomputed edge array only when the geometry changes
+        if self.zone_engine is None or self.zone_engine.polygon != [tuple(p) for p in self.polygon] \
+                or self.zone_engine.tripwires != self.tripwires:
+            self.zone_engine = TripwireEngine(self.polygon, self.tripwires)
+        return self.zone_engine
+
+    def apply_zones(self, zones):
+        """Swap in compiled zones (zone_config.CompiledZones) between two frames."""
+        self.polygon = list(zones.polygon)
+        self.tripwires = zones.tripwires
+        self.zone_engine = zones.engine
+        self.zone_mask = zones.mask
+        # Re-evaluate current tracks against the new geometry without alerting:
+        # a zone moving under a standing person is not an intrusion
+        for (object_id, centroid) in self.tracker.objects.items():
+            new_state = "INSIDE" if self.check_perimeter_intrusion(centroid) else "OUTSIDE"
+            if self.tracker.states.get(object_id) != new_state:
+                self.tracker.update_state(object_id, new_state)
+                self.state_change_frames[object_id] = 0
+        self.prealerted.clear()
+        print(f"[INFO] Zones loaded from {zones.source}: {len(self.polygon)}-point perimeter, "
+              f"{len(self.tripwires)} tripwire(s)")
+
+    def checkpoint_arrays(self):
+        """Tracker arrays plus the per-track zone and debounce state, for checkpoint.py."""
+        arrays = self.tracker.get_arrays()
+        ids = arrays["ids"].tolist()
+        arrays["debounce"] = np.array([self.state_change_frames.get(i, 0) for i in ids], np.int32)
+        arrays["prealerted"] = np.array([i in self.prealerted for i in ids], bool)
+        arrays["alert_count"] = np.array(self.alert_count)
+        arrays["camera"] = np.array(self.camera_id)
+        return arrays
+
+    def restore_checkpoint(self):
+        # Tracks that were inside before a restart stay INSIDE, so no alert storm,
+        # and object IDs continue where they left off instead of restarting at 0
+        arrays = self.checkpointer.load()
+        if arrays is None:
+            return
+        if str(arrays["camera"]) != self.camera_id:
+            print(f"[WARN] Checkpoint {self.checkpointer.path} belongs to camera {arrays['camera']}; ignored")
+            return
+        self.tracker.set_arrays(arrays)
+        for (i, object_id) in enumerate(arrays["ids"].tolist()):
+            self.state_change_frames[object_id] = int(arrays["debounce"][i])
+            if arrays["prealerted"][i]:
+                self.prealerted.add(object_id)
+        self.last_points = {object_id: c.copy() for (object_id, c) in self.tracker.objects.items()}
+        self.alert_count = int(arrays["alert_count"])
+        print(f"[INFO] Restored {len(self.tracker.tracks)} tracks ({int(arrays['inside'].sum())} inside) "
+              f"from {self.checkpointer.path}, next ID {self.tracker.nextObjectID}")
+
+    def check_crossings(self, objects):
+        """Segment-crossing events since the previous processed frame, per object_id."""
+        ids = [i for i in objects.keys() if i in self.last_points]
+        if not ids:
+            return {}
+        prev = np.array([self.last_points[i] for i in ids])
+        cur = np.array([objects[i] for i in ids])
+        events = self.get_zone_engine().check(prev, cur)
+        return dict(zip(ids, events))
+
+    def notify(self, event, object_id, timestamp, **fields):
+        # Hand off to the notifier thread; never blocks the frame loop
+        if self.notifier is not None:
+            if object_id is not None:
+                fields["object_id"] = int(object_id)
+            self.notifier.submit(dict(fields, event=event, camera=self.camera_id, timestamp=timestamp))
+
+    def log_tripwire(self, object_id, name, direction, timestamp):
+        with open(self.log_file, "a") as f:
+            f.write(f"[TRIPWIRE] Object {object_id} crossed '{name}' {direction} at {timestamp}\n")
+        print(f"[TRIPWIRE] Object {object_id} crossed '{name}' {direction} at {timestamp}")
+
     def log_alert(self, object_id, timestamp):
         with open(self.log_file, "a") as f:
             f.write(f"[ALERT] Object {object_id} ENTERED perimeter at {timestamp}\n")
         print(f"[ALERT] Object {object_id} ENTERED perimeter at {timestamp}")
 
-    def save_alert_snapshot(self, frame, object_id):
-        timestamp = time.strftime("%Y%m%d_%H%M%S")
-        filename = f"snapshots/intrusion_obj_{object_id}_{timestamp}.jpg"
-        cv2.imwrite(filename, frame)
-        print(f"[SNAPSHOT] Saved: {filename}")
+    def log_prealert(self, object_id, seconds, timestamp):
+        with open(self.log_file, "a") as f:
+            f.write(f"[PRE-ALERT] Object {object_id} predicted to cross perimeter in {seconds:.1f}s at {timestamp}\n")
+        print(f"[PRE-ALERT] Object {object_id} predicted to cross perimeter in {seconds:.1f}s at {timestamp}")
+        self.notify("PRE-ALERT", object_id, timestamp, seconds=round(float(seconds), 2))
+
+    def log_health(self, event, timestamp):
+        with open(self.log_file, "a") as f:
+            f.write(f"[HEALTH] Camera {self.camera_id} {event} at {timestamp}\n")
+        print(f"[HEALTH] Camera {self.camera_id} {event} at {timestamp}")
+        self.notify(event, None, timestamp)
+
+    def raise_alert(self, frame, object_id, zone, point, box, event, timestamp, snapshot=True, **fields):
+        """Evidence and notification for one alert, or for its incident when alerts are grouped."""
+        if self.incidents is None:
+            if snapshot:
+                self.save_alert_snapshot(frame, object_id, box)
+            self.notify(event, object_id, timestamp, **fields)
+            return
+        (incident, is_new) = self.incidents.add(self.camera_id, zone, object_id, point)
+        if is_new:
+            if snapshot:
+                incident.evidence = self.save_alert_snapshot(frame, object_id, box)
+            self.notify(event, object_id, timestamp, incident=incident.id, **fields)
+        else:
+            print(f"[INCIDENT] Object {object_id} joined incident {incident.id} "
+                  f"({len(incident.participants)} participants)")
+
+    def close_incidents(self, closed):
+        for incident in closed:
+            record = incident.record()
+            print(f"[INCIDENT] {incident.id} closed: {len(incident.participants)} participants in '{incident.zone}'")
+            self.notify("INCIDENT_CLOSED", None, record["end"], incident=incident.id, zone=incident.zone,
+                        participants=[p["object_id"] for p in record["participants"]], evidence=incident.evidence)
+
+    def save_alert_snapshot(self, frame, object_id, box=None):
+        # With a main stream, evidence comes from the full-resolution frame
+        # grabbed at the same time as the substream frame we detected on
+        if self.evidence is not None and self.vs.timestamp is not None:
+            (main_frame, _) = self.evidence.retrieve_at(self.vs.timestamp)
+            if main_frame is not None:
+                if box is not None:
+                    from dual_stream import scale_box
+                    box = scale_box(box, frame.shape, main_frame.shape)
+                frame = main_frame
+        # Crop around the intruder plus a full-frame thumbnail, within the disk budget
+        paths = self.snapshots.save(frame, box, self.camera_id, object_id)
+        for filename in paths:
+            print(f"[SNAPSHOT] Saved: {filename}")
+        return paths
 
     def process_frame(self, frame):
         self.frame_count += 1
-        if self.frame_count % SKIP_FRAMES != 0:
+        if self.frame_count % self.governor.skip_frames != 0:
             return frame
-
-        rects = self.detect_objects(frame)
-        objects = self.tracker.update(rects)
+        return self.analyze_frame(frame)
+
+    def analyze_frame(self, frame):
+        """Detection, tracking and zone logic for a frame that is due for analysis."""
+        skip_frames = self.governor.skip_frames
+        start = time.perf_counter()
+        set_stage("health")
+        if self.zone_watcher is not None:
+            self.zone_watcher.set_frame_size(frame.shape[:2])
+            zones = self.zone_watcher.poll()
+            if zones is not None:
+                self.apply_zones(zones)
+
+        now = self.vs.timestamp if self.vs.timestamp is not None else time.time()
+        (duplicate, health_event) = self.health.check(frame, now)
+        if health_event is not None:
+            self.log_health(health_event, time.strftime("%Y-%m-%d %H:%M:%S"))
+        if duplicate:
+            # Repeated frame: nothing moved, so skip inference and keep the tracks as they are
+            rects = self.last_rects
+            objects = self.tracker.objects
+        else:
+            set_stage("detect")
+            if self.scheduler is not None:
+                # Shared detector: wait for this camera's turn, ordered by how much is happening here
+                rects = self.scheduler.run(self.camera_id, self.detect_objects, frame, activity=self.activity_level())
+            else:
+                rects = self.detect_objects(frame)
+            self.mark_startup("first detection")
+            set_stage("track")
+            if self.suppressor is not None:
+                # Drop detections on learned static false positives before tracking,
+                # but never anyone in the zone or anyone who walked to where they stand
+                rects = self.suppressor.filter(rects, frame.shape, now, tracks=self.suppression_tracks(),
+                                               inside=[self.check_perimeter_intrusion(box_to_anchor(r)) for r in rects])
+            objects = self.tracker.update(rects)
+            for (object_id, point) in objects.items():
+                self.origins.setdefault(object_id, point.copy())
+        self.last_rects = rects
         states = self.tracker.get_states()
+        crossings = self.check_crossings(objects)
+        self.last_points = {object_id: centroid.copy() for (object_id, centroid) in objects.items()}
 
         # Show perimeter warning if not set
         if len(self.polygon) < 3:
             cv2.putText(frame, 'PERIMETER NOT SET!', (30, 80), cv2.FONT_HERSHEY_SIMPLEX, 2.0, (0,0,255), 6, cv2.LINE_AA)
+            self.governor.observe(time.perf_counter() - start)
             return frame
 
-        # Store rects by index for drawing (approximate matching)
-        rects_by_index = {}
-        if len(rects) > 0:
-            for idx, rect in enumerate(rects):
-                if idx < len(list(objects.keys())):
-                    obj_id = list(objects.keys())[idx]
-                    rects_by_index[obj_id] = rect
-
+        # Zone logic first, while the frame is still unannotated for snapshots
+        set_stage("zones")
+        record = self.trajectories is not None and not duplicate
+        if record:
+            self.trajectories.frame_size = (frame.shape[1], frame.shape[0])
+            wall = time.time()
+        drawn = []
         for (object_id, centroid) in objects.items():
             is_inside = self.check_perimeter_intrusion(centroid)
             old_state = states.get(object_id, "OUTSIDE")
@@ -137,26 +412,57 @@ class PerimeterIntrusionSystem:
             # Debug line (leave visible)
             print(f"Object {object_id}: old={old_state}, new={new_state}, point={centroid}, frames_since_change={self.state_change_frames[object_id]}")
 
+            # Tripwire lines are reported on every crossing in their direction
+            events = crossings.get(object_id, [])
+            for (name, direction) in events:
+                if name != PERIMETER:
+                    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+                    self.log_tripwire(object_id, name, direction, timestamp)
+                    self.raise_alert(frame, object_id, name, centroid, None, "TRIPWIRE", timestamp,
+                                     snapshot=False, tripwire=name, direction=direction)
+
+            # A target can cross the whole zone between two processed frames and
+            # still be OUTSIDE; the motion segment then shows an inward crossing
+            jumped_through = (not state_changed and new_state == "OUTSIDE"
+                              and (PERIMETER, DIR_IN) in events)
+
             # Alert and snapshot when person enters perimeter
             # Trigger when state changes from OUTSIDE to INSIDE
-            if state_changed and new_state == "INSIDE":
+            if (state_changed and new_state == "INSIDE") or jumped_through:
                 timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
                 self.alert_count += 1
                 self.log_alert(object_id, timestamp)
-                self.save_alert_snapshot(frame, object_id)
-
-            # Draw bounding box - use stored rect or draw around centroid
+                self.raise_alert(frame, object_id, PERIMETER, centroid, self.tracker.get_box(object_id, rects),
+                                 "ENTERED", timestamp)
+
+            # Pre-alert when the track's velocity points at the perimeter
+            if new_state == "INSIDE":
+                self.prealerted.discard(object_id)
+            elif object_id not in self.prealerted:
+                steps = self.tracker.predict_crossing(object_id, self.polygon)
+                if steps is not None:
+                    seconds = steps * skip_frames / self.fps
+                    if seconds <= PREALERT_SECONDS:
+                        self.prealerted.add(object_id)
+                        self.log_prealert(object_id, seconds, time.strftime("%Y-%m-%d %H:%M:%S"))
+
+            if record:
+                self.trajectories.append(wall, object_id, centroid, self.tracker.get_box(object_id, rects), new_state)
+
+            drawn.append((object_id, centroid, new_state))
+
+        if self.occupancy is not None:
+            self.occupancy.frame_size = (frame.shape[1], frame.shape[0])
+            self.occupancy.update(drawn, now)
+
+        set_stage("draw")
+        for (object_id, centroid, new_state) in drawn:
+            # Draw bounding box - matched detection, or the predicted box while occluded
             color = (0, 255, 0) if new_state == "OUTSIDE" else (0, 0, 255)
-            if object_id in rects_by_index:
-                (startX, startY, endX, endY) = rects_by_index[object_id]
-                cv2.rectangle(frame, (startX, startY), (endX, endY), color, 4)
-            else:
-                # Fallback: draw box around centroid
-                box_size = 80
-                cv2.rectangle(frame, 
-                            (centroid[0] - box_size, centroid[1] - box_size),
-                            (centroid[0] + box_size, centroid[1] + box_size), 
-                            color, 4)
+            if new_state == "OUTSIDE" and object_id in self.prealerted:
+                color = (0, 165, 255)
+            (startX, startY, endX, endY) = self.tracker.get_box(object_id, rects)
+            cv2.rectangle(frame, (startX, startY), (endX, endY), color, 4)
 
             # Draw circle for centroid, larger
             cv2.circle(frame, tuple(centroid), 10, color, -1)
@@ -174,16 +480,39 @@ class PerimeterIntrusionSystem:
 
         cv2.putText(frame, f"Alerts: {self.alert_count}", (10, 30),
                     cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+
+        # Tracks inside or about to reach the perimeter keep detection at full rate
+        activity = bool(self.prealerted) or any(s == "INSIDE" for s in states.values())
+        set_stage("housekeeping")
+        if self.governor.observe(time.perf_counter() - start, activity=activity):
+            print(f"[INFO] Governor: {self.governor.status()}")
+        if self.incidents is not None:
+            self.close_incidents(self.incidents.expire())
+        if self.cpu_budget is not None:
+            self.cpu_budget.poll()
+        if self.checkpointer is not None and self.checkpointer.due():
+            self.checkpointer.save(self.checkpoint_arrays())
         return frame
 
-    def run(self):
-        cv2.namedWindow("Perimeter Intrusion System")
-        cv2.setMouseCallback("Perimeter Intrusion System", self.draw_perimeter)
+    def show(self, frame):
+        """Send a frame to the live view and/or the desktop window. Returns the key pressed."""
+        if self.live_view is not None:
+            self.live_view.publish(self.camera_id, frame)
+        if self.headless:
+            return 255
+        cv2.imshow("Perimeter Intrusion System", frame)
+        return cv2.waitKey(1) & 0xFF
+
+    def window_closed(self):
+        return not self.headless and cv2.getWindowProperty("Perimeter Intrusion System", cv2.WND_PROP_VISIBLE) < 1
 
+    def run(self):
         # Try to open the video/camera source, fail gracefully
         if not self.vs.isOpened():
             print("[ERROR] Could not open video source!")
             print("Tip: Try running with a video file, e.g. python main.py --video videos/test_video.mp4")
+            if self.headless:
+                return
             blank = np.zeros((380, 640, 3), np.uint8)
             cv2.putText(blank, "VIDEO SOURCE ERROR", (40, 140), cv2.FONT_HERSHEY_SIMPLEX, 1.3, (0, 0, 255), 2)
             cv2.putText(blank, "Check webcam or use: python main.py --video filename.mp4", (10, 200), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
@@ -195,14 +524,24 @@ class PerimeterIntrusionSystem:
         print("============================================================")
         print("Perimeter Intrusion Detection System")
         print("============================================================")
-        print("Left-click to draw polygon perimeter. Press 'd' for done, 'r' to reset, 'q' to quit.\n")
+        if not self.headless:
+            cv2.namedWindow("Perimeter Intrusion System")
+            cv2.setMouseCallback("Perimeter Intrusion System", self.draw_perimeter)
+        if len(self.polygon) < 3:
+            if self.headless:
+                print("[ERROR] Headless mode needs a perimeter, e.g. --polygon \"100,100 500,100 500,400\"")
+                self.vs.release()
+                return
+            print("Left-click to draw polygon perimeter. Press 'd' for done, 'r' to reset, 'q' to quit.\n")
 
         background_frame = None
+        perimeter_given = len(self.polygon) >= 3
         try:
-            while True:
+            while not perimeter_given:
                 ret, frame = self.vs.read()
                 if not ret:
                     break
+                self.mark_startup("first frame")
                 display = frame.copy()
                 background_frame = frame.copy()
 
@@ -231,32 +570,210 @@ class PerimeterIntrusionSystem:
             # Detection mode banner
             detection_mode_banner = True
             while True:
-                ret, frame = self.vs.read()
+                # Skipped frames are only grabbed, never decoded
+                stride = self.governor.skip_frames
+                set_stage("decode")
+                ret, frame = self.vs.read(stride)
                 if not ret:
                     break
-                frame = self.process_frame(frame)
+                self.mark_startup("first frame")
+                self.frame_count += stride
+                frame = self.analyze_frame(frame)
                 if detection_mode_banner:
                     cv2.rectangle(frame,(0,0),(frame.shape[1],48),(0,0,0),-1)
                     cv2.putText(frame, "DETECTION MODE: Press q to quit", (12,36), 
                         cv2.FONT_HERSHEY_SIMPLEX, 1.03, (0,255,0), 3, cv2.LINE_AA)
                     detection_mode_banner = False
-                cv2.imshow("Perimeter Intrusion System", frame)
-                k = cv2.waitKey(1) & 0xFF
-                if k == ord('q') or cv2.getWindowProperty("Perimeter Intrusion System", cv2.WND_PROP_VISIBLE) < 1:
+                set_stage("show")
+                k = self.show(frame)
+                if k == ord('q') or self.window_closed():
                     break
         finally:
             print(f"\nTotal alerts: {self.alert_count}")
             print(f"Alerts logged to: {self.log_file}")
             print("Snapshots saved to: snapshots/ directory")
+            print(f"Decode: {self.vs.decode_time:.2f}s for {self.vs.frames_grabbed} frames "
+                  f"({self.vs.frames_decoded} decoded)")
             self.vs.release()
-            cv2.destroyAllWindows()
+            print(f"Duplicate frames skipped: {self.health.duplicates}")
+            if self.checkpointer is not None:
+                self.checkpointer.save(self.checkpoint_arrays())
+                print(f"Checkpoints: {self.checkpointer.saves} written, "
+                      f"{self.checkpointer.save_time * 1000 / self.checkpointer.saves:.2f} ms each")
+            if self.trajectories is not None:
+                self.trajectories.close()
+            if self.occupancy is not None:
+                self.occupancy.close()
+            if self.suppressor is not None:
+                self.suppressor.save()
+                print(f"Static suppression: {self.suppressor.suppressed} detections dropped, "
+                      f"{self.suppressor.static_cells()} static cells")
+            if self.evidence is not None:
+                print(f"Main stream: {self.evidence.reader.frames_grabbed} frames grabbed, "
+                      f"{self.evidence.reader.frames_decoded} decoded for snapshots")
+                self.evidence.stop()
+            if self.live_view is not None:
+                self.live_view.stop()
+            if self.zone_watcher is not None:
+                self.zone_watcher.stop()
+            if self.incidents is not None:
+                self.close_incidents(self.incidents.close_all())
+                print(f"Incidents: {self.incidents.alerts} alerts grouped into {self.incidents.incidents}")
+            if self.cpu_budget is not None:
+                self.cpu_budget.leave()
+            if self.notifier is not None:
+                self.notifier.stop()
+                print(f"Notifications: {self.notifier.metrics()}")
+            if not self.headless:
+                cv2.destroyAllWindows()
 
 # ================= MAIN ==================
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--video", type=str, default="0", help="Path to video file or 0 for webcam")
+    parser.add_argument("--main-stream", type=str, default="",
+                        help="High-resolution stream of the same camera, used only for alert snapshots "
+                             "(--video is then the low-resolution substream)")
+    parser.add_argument("--stream-offset", type=float, default=0.0,
+                        help="Seconds the main stream lags the substream (live dual-stream)")
+    parser.add_argument("--fixed-rate", action="store_true",
+                        help="Disable the load governor (always SKIP_FRAMES and 300x300 input)")
+    parser.add_argument("--camera", type=str, default="cam0", help="Camera name used for streams and logs")
+    parser.add_argument("--polygon", type=str, default="",
+                        help="Perimeter as 'x1,y1 x2,y2 x3,y3 ...' (skips interactive drawing)")
+    parser.add_argument("--zones", type=str, default="",
+                        help="JSON zone file (perimeter + tripwires), reloaded when it changes; "
+                             "replaces --polygon")
+    parser.add_argument("--headless", action="store_true", help="Run without a desktop window")
+    parser.add_argument("--serve", type=int, default=0, help="Serve live MJPEG/WebSocket view on this port")
+    parser.add_argument("--view-fps", type=float, default=5.0, help="Live view frame rate")
+    parser.add_argument("--view-width", type=int, default=640, help="Live view maximum width")
+    parser.add_argument("--webhook", type=str, default="", help="POST alerts in batches to this URL")
+    parser.add_argument("--snapshot-format", choices=["jpg", "webp"], default="jpg", help="Snapshot encoding")
+    parser.add_argument("--snapshot-quality", type=int, default=85, help="Snapshot JPEG/WebP quality")
+    parser.add_argument("--snapshot-budget-mb", type=int, default=SNAPSHOT_BUDGET_MB,
+                        help="Disk budget for snapshots; oldest are deleted first")
+    parser.add_argument("--camera-quota-mb", type=int, default=0, help="Per-camera snapshot quota (0 = none)")
+    parser.add_argument("--suppress-static", action="store_true",
+                        help="Learn and drop motionless false-positive detections (map in static_maps/)")
+    parser.add_argument("--trajectories", action="store_true",
+                        help="Record every track's path under trajectories/ (query with trajectory_store.py)")
+    parser.add_argument("--occupancy", action="store_true",
+                        help="Keep occupancy/dwell tiles under occupancy/ (heat maps with occupancy.py)")
+    parser.add_argument("--checkpoint", type=str, default="",
+                        help="Checkpoint tracks and zone states to this file and restore them on restart")
+    parser.add_argument("--incident-window", type=float, default=INCIDENT_WINDOW,
+                        help="Group alerts within this many seconds into one incident (0 = one per alert)")
+    parser.add_argument("--cpu-budget", type=str, default="",
+                        help="Node budget file shared by all camera processes (see cpu_budget.py)")
+    parser.add_argument("--detector-profile", type=str, default="",
+                        help="Tuned detector profile (default: profiles/<camera>.json if it exists)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Sample all threads for the whole run; flame graphs go to flame/")
+    parser.add_argument("--profile-hz", type=float, default=97, help="Profiler sampling rate")
+    parser.add_argument("--profile-seconds", type=float, default=30,
+                        help="Length of a profile triggered at runtime (SIGUSR2 or /admin/profile)")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="Report time to model load, first frame and first detection")
     args = parser.parse_args()
+    if args.polygon and args.zones:
+        # The zone file (and every reload of it) would replace the polygon, and its compiled mask
+        # would disagree with a polygon set on top of it
+        parser.error("--polygon and --zones both define the perimeter; put it in the zone file")
+
+    snapshots = SnapshotStore("snapshots", budget_bytes=args.snapshot_budget_mb * 1024 * 1024,
+                              camera_quota_bytes=args.camera_quota_mb * 1024 * 1024 or None,
+                              fmt=args.snapshot_format, quality=args.snapshot_quality)
+
+    notifier = None
+    if args.webhook:
+        from notifier import AlertNotifier
+        notifier = AlertNotifier(args.webhook)
+        notifier.start()
+
+    # Always armed: `kill -USR2 <pid>` profiles a running process for --profile-seconds
+    from sampling_profiler import SamplingProfiler
+    profiler = SamplingProfiler(args.camera, hz=args.profile_hz)
+    profiler.install_signal(args.profile_seconds)
+    if args.profile:
+        profiler.start()
+
+    live_view = None
+    if args.serve:
+        from live_view import LiveViewServer
+        live_view = LiveViewServer(port=args.serve, fps=args.view_fps, width=args.view_width)
+
+        def profile_action(params):
+            seconds = float(params.get("seconds", args.profile_seconds))   # ValueError -> 400
+            if not (0 < seconds < float("inf")):
+                raise ValueError("seconds must be a positive number")
+            if not profiler.start(seconds):
+                return "profiler already running"
+            return f"profiling {args.camera} (pid {os.getpid()}) for {seconds:g}s"
+        live_view.admin["profile"] = profile_action
+        live_view.start()
+
+    evidence = None
+    if args.main_stream:
+        from dual_stream import EvidenceStream
+        evidence = EvidenceStream(args.main_stream, offset=args.stream_offset)
+        if evidence.isOpened():
+            evidence.start()
+        else:
+            print("[WARN] Could not open main stream; snapshots will use the substream")
+            evidence = None
+
+    suppressor = None
+    if args.suppress_static:
+        from static_suppression import StaticSuppressor
+        suppressor = StaticSuppressor(os.path.join("static_maps", f"{args.camera}.npz"))
+
+    trajectories = None
+    if args.trajectories:
+        from trajectory_store import TrajectoryStore
+        trajectories = TrajectoryStore("trajectories", args.camera)
+
+    occupancy = None
+    if args.occupancy:
+        from occupancy import OccupancyAccumulator
+        occupancy = OccupancyAccumulator("occupancy", args.camera)
+
+    checkpointer = None
+    if args.checkpoint:
+        from checkpoint import Checkpointer
+        checkpointer = Checkpointer(args.checkpoint)
+
+    incidents = None
+    if args.incident_window > 0:
+        from incidents import IncidentAggregator
+        incidents = IncidentAggregator(args.incident_window)
+
+    cpu_budget = None
+    if args.cpu_budget:
+        from cpu_budget import BudgetClient
+        cpu_budget = BudgetClient(args.cpu_budget, args.camera)
+
+    detector_profile = None
+    profile_path = args.detector_profile or os.path.join("profiles", f"{args.camera}.json")
+    if os.path.exists(profile_path):
+        from detector_tuner import load_profile
+        detector_profile = load_profile(profile_path)
 
     video_source = 0 if args.video == "0" else args.video
-    system = PerimeterIntrusionSystem(video_source)
-    system.run()
+    zone_watcher = None
+    if args.zones:
+        from zone_config import ZoneWatcher
+        zone_watcher = ZoneWatcher(args.zones)
+    system = PerimeterIntrusionSystem(video_source, adaptive=not args.fixed_rate, camera_id=args.camera,
+                                      headless=args.headless, live_view=live_view, notifier=notifier,
+                                      snapshots=snapshots, startup_profile=args.startup_profile,
+                                      zone_watcher=zone_watcher, evidence=evidence, suppressor=suppressor,
+                                      trajectories=trajectories, checkpointer=checkpointer,
+                                      incidents=incidents, cpu_budget=cpu_budget,
+                                      detector_profile=detector_profile, occupancy=occupancy)
+    if args.polygon:
+        system.polygon = [tuple(int(v) for v in p.split(",")) for p in args.polygon.split()]
+    try:
+        system.run()
+    finally:
+        profiler.stop()
@@ -0,0 +1,47 @@
+# model_cache.py
+"""
+Process-wide cache of loaded detector networks.
+
+Parsing the Caffe prototxt and loading the caffemodel is the slowest part
+of startup. load_net() does it once per process and returns the same Net
+afterwards. A supervisor that starts several workers can call preload()
+and then start_workers(): the workers are forked from the parent and
+inherit the already parsed network (copy-on-write) instead of loading it
+again. Fork before running any inference in the parent, so no OpenCV
+worker threads exist at fork time.
+"""
+
+import multiprocessing
+import os
+import cv2
+
+_nets = {}
+
+
+def _key(*paths):
+    # Reload if a model file is replaced on disk. A missing file is left for
+    # readNetFromCaffe to report as cv2.error, which callers fall back on.
+    return tuple((p, os.path.getmtime(p) if os.path.exists(p) else None) for p in paths)
+
+
+def load_net(prototxt_path, caffemodel_path):
+    key = _key(prototxt_path, caffemodel_path)
+    net = _nets.get(key)
+    if net is None:
+        net = cv2.dnn.readNetFromCaffe(prototxt_path, caffemodel_path)
+        _nets[key] = net
+    return net
+
+
+def preload(prototxt_path, caffemodel_path):
+    """Load the network in this (parent) process so forked workers inherit it."""
+    load_net(prototxt_path, caffemodel_path)
+
+
+def start_workers(target, args_list):
+    """Fork one process per args tuple; each inherits the preloaded network."""
+    ctx = multiprocessing.get_context("fork")
+    workers = [ctx.Process(target=target, args=args) for args in args_list]
+    for w in workers:
+        w.start()
+    return workers
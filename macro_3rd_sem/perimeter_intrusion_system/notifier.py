@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Batched asynchronous alert notifier with retry and a disk spool.
+
+submit() appends the alert to a spool file and hands it to an asyncio
+thread, so the frame loop never waits on the network. Alerts that arrive
+within `batch_window` seconds are POSTed together as one JSON request over
+a small pool of keep-alive connections; failures are retried with
+exponential backoff. Delivered alert ids are appended to an ack file, and
+anything not acked is re-sent after a restart. Ids keep increasing across
+restarts (receivers may deduplicate by id), and a batch the receiver
+rejects permanently (4xx other than 408/429) is moved to a dead-letter file
+instead of blocking the queue.
+
+Run `python notifier.py --receive 9000` for a local stand-in receiver.
+"""
+
+import argparse
+import asyncio
+import collections
+import json
+import os
+import random
+import ssl
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+class SpoolQueue:
+    """Append-only JSON-lines spool plus an ack file of delivered ids."""
+
+    def __init__(self, path, compact_every=1000):
+        self.path = path
+        self.ack_path = path + ".ack"
+        self.id_path = path + ".id"     # next id, kept when compaction empties the spool
+        self.dead_path = path + ".dead"  # batches the receiver rejected for good
+        self.compact_every = compact_every
+        self.lock = threading.Lock()
+        self.pending = collections.OrderedDict()   # id -> record
+        self.acked_since_compact = 0
+        self.next_id = 1
+        self._load()
+        self.spool = open(self.path, "a")
+        self.acks = open(self.ack_path, "a")
+
+    def _load(self):
+        try:
+            with open(self.id_path) as f:
+                self.next_id = int(f.read().strip() or 1)
+        except (OSError, ValueError):
+            pass
+        acked = set()
+        if os.path.exists(self.ack_path):
+            with open(self.ack_path) as f:
+                acked = {int(line) for line in f if line.strip()}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line after a crash
+                    self.next_id = max(self.next_id, record["id"] + 1)
+                    if record["id"] not in acked:
+                        self.pending[record["id"]] = record
+
+    def append(self, alert):
+        with self.lock:
+            record = {"id": self.next_id, "t": time.time(), "alert": alert}
+            self.next_id += 1
+            self.pending[record["id"]] = record
+            self.spool.write(json.dumps(record) + "\n")
+            self.spool.flush()
+        return record
+
+    def ack(self, ids):
+        with self.lock:
+            for i in ids:
+                self.pending.pop(i, None)
+            self.acks.write("".join(f"{i}\n" for i in ids))
+            self.acks.flush()
+            self.acked_since_compact += len(ids)
+            if self.acked_since_compact >= self.compact_every or not self.pending:
+                self._compact()
+
+    def _compact(self):
+        # Remember the next id first: the rewritten spool may hold no records to derive it from
+        tmp = self.id_path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(f"{self.next_id}\n")
+        os.replace(tmp, self.id_path)
+        # Rewrite the spool with only pending records, then clear the acks
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            for record in self.pending.values():
+                f.write(json.dumps(record) + "\n")
+        self.spool.close()
+        self.acks.close()
+        os.replace(tmp, self.path)
+        self.spool = open(self.path, "a")
+        self.acks = open(self.ack_path, "w")
+        self.acked_since_compact = 0
+
+    def dead_letter(self, records, status):
+        """Keep records the receiver refused in the dead-letter file, then ack them."""
+        with self.lock:
+            with open(self.dead_path, "a") as f:
+                for record in records:
+                    f.write(json.dumps(dict(record, status=status)) + "\n")
+        self.ack([r["id"] for r in records])
+
+    def close(self):
+        with self.lock:
+            self.spool.close()
+            self.acks.close()
+
+
+class _ConnectionPool:
+    def __init__(self, url, size):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.ssl = ssl.create_default_context() if parts.scheme == "https" else None
+        self.path = (parts.path or "/") + ("?" + parts.query if parts.query else "")
+        self.idle = []
+        self.slots = asyncio.Semaphore(size)
+
+    async def post(self, body, timeout):
+        """POST body; returns the HTTP status. Connections are reused while the server keeps them open."""
+        async with self.slots:
+            if self.idle:
+                (reader, writer) = self.idle.pop()
+            else:
+                (reader, writer) = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port, ssl=self.ssl), timeout)
+            try:
+                writer.write((f"POST {self.path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                              f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+                              f"Connection: keep-alive\r\n\r\n").encode() + body)
+                await writer.drain()
+                head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout)
+                lines = head.decode("latin-1").split("\r\n")
+                status = int(lines[0].split(" ")[1])
+                headers = {k.strip().lower(): v.strip() for (k, _, v) in
+                           (line.partition(":") for line in lines[1:] if ":" in line)}
+                length = int(headers.get("content-length", 0))
+                if length:
+                    await asyncio.wait_for(reader.readexactly(length), timeout)
+            except Exception:
+                writer.close()
+                raise
+            if headers.get("connection", "").lower() == "close":
+                writer.close()
+            else:
+                self.idle.append((reader, writer))
+            return status
+
+    def close(self):
+        for (_, writer) in self.idle:
+            writer.close()
+        self.idle = []
+
+
+class AlertNotifier:
+    def __init__(self, url, spool_path="alert_spool.jsonl", batch_window=0.2, max_batch=100,
+                 pool_size=4, timeout=5.0, base_backoff=0.5, max_backoff=30.0):
+        self.url = url
+        self.spool = SpoolQueue(spool_path)
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.loop = None
+        self.queue = None
+        self.thread = None
+        self.latencies = collections.deque(maxlen=1000)   # seconds from submit to delivery
+        self.delivered = 0
+        self.batches = 0
+        self.retries = 0
+        self.dead_lettered = 0
+        self._started = threading.Event()
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="alert-notifier", daemon=True)
+        self.thread.start()
+        self._started.wait()
+        if self.spool.pending:
+            print(f"[INFO] Notifier: re-sending {len(self.spool.pending)} spooled alerts")
+            for record in list(self.spool.pending.values()):
+                self.loop.call_soon_threadsafe(self.queue.put_nowait, record)
+
+    def submit(self, alert):
+        """Queue an alert dict for delivery. Returns immediately."""
+        record = self.spool.append(alert)
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, record)
+
+    def metrics(self):
+        lat = sorted(self.latencies)
+        return {
+            "queue_depth": len(self.spool.pending),
+            "delivered": self.delivered,
+            "batches": self.batches,
+            "retries": self.retries,
+            "dead_lettered": self.dead_lettered,
+            "latency_avg_ms": 1000 * sum(lat) / len(lat) if lat else 0.0,
+            "latency_p95_ms": 1000 * lat[int(0.95 * (len(lat) - 1))] if lat else 0.0,
+        }
+
+    def stop(self, flush_timeout=5.0):
+        """Try to deliver what is queued, then stop. Undelivered alerts stay spooled."""
+        deadline = time.time() + flush_timeout
+        while self.spool.pending and time.time() < deadline:
+            time.sleep(0.05)
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout=2.0)
+        self.spool.close()
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.queue = asyncio.Queue()
+        self.pool = _ConnectionPool(self.url, self.pool_size)
+        self.loop.create_task(self._batcher())
+        self._started.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            tasks = asyncio.all_tasks(self.loop)
+            for task in tasks:
+                task.cancel()
+            self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self.pool.close()
+            self.loop.close()
+
+    async def _batcher(self):
+        in_flight = asyncio.Semaphore(self.pool_size)
+        while True:
+            batch = [await self.queue.get()]
+            deadline = self.loop.time() + self.batch_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - self.loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            await in_flight.acquire()
+            task = self.loop.create_task(self._deliver(batch))
+            task.add_done_callback(lambda _: in_flight.release())
+
+    async def _deliver(self, batch):
+        body = json.dumps({"alerts": [dict(r["alert"], id=r["id"]) for r in batch]}).encode()
+        attempt = 0
+        while True:
+            try:
+                status = await self.pool.post(body, self.timeout)
+                if 200 <= status < 300:
+                    break
+                if 400 <= status < 500 and status not in (408, 429):
+                    # Retrying cannot fix a rejected request, and it would block everything behind it
+                    print(f"[WARN] Notifier: receiver rejected {len(batch)} alert(s) with {status}; "
+                          f"moved to {self.spool.dead_path}")
+                    self.spool.dead_letter(batch, status)
+                    self.dead_lettered += len(batch)
+                    return
+                print(f"[WARN] Notifier: receiver answered {status}")
+            except Exception as e:
+                print(f"[WARN] Notifier: delivery failed ({e.__class__.__name__}: {e})")
+            self.retries += 1
+            delay = min(self.max_backoff, self.base_backoff * 2 ** attempt)
+            attempt += 1
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+        now = time.time()
+        self.spool.ack([r["id"] for r in batch])
+        self.latencies.extend(now - r["t"] for r in batch)
+        self.delivered += len(batch)
+        self.batches += 1
+
+
+async def _receive(reader, writer):
+    """Stand-in webhook receiver: prints each batch and answers 200, keep-alive."""
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.decode("latin-1").split("\r\n"):
+                if line.lower().startswith("content-length:"):
+                    length = int(line.split(":", 1)[1])
+            body = await reader.readexactly(length)
+            alerts = json.loads(body).get("alerts", [])
+            print(f"[RECEIVER] batch of {len(alerts)}: {[a.get('event') for a in alerts]}")
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        writer.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in receiver for alert notifications")
+    parser.add_argument("--receive", type=int, default=9000, help="Port to listen on")
+    args = parser.parse_args()
+
+    async def serve():
+        server = await asyncio.start_server(_receive, "127.0.0.1", args.receive)
+        print(f"[INFO] Receiving alerts on http://127.0.0.1:{args.receive}/")
+        async with server:
+            await server.serve_forever()
+    asyncio.run(serve())
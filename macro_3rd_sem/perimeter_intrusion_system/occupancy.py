@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Occupancy heat maps and dwell-time statistics, kept up to date from tracks.
+
+OccupancyAccumulator.update() is called once per analyzed frame with the
+tracked anchor points and their zone (INSIDE/OUTSIDE the perimeter). It
+adds the time since the previous frame to the grid cell under each person
+(person-seconds) and counts a visit whenever a track moves into a cell.
+Per zone it keeps person-seconds, entries and a histogram of how long each
+stay lasted. That is a handful of array increments per frame.
+
+The grid is GRID_ROWS x GRID_COLS cells over the frame, whatever its
+resolution, so tiles of one camera always add up. The running hour is
+rewritten every flush_seconds as occupancy/<camera>/<YYYYmmdd_HH>.npz
+(UTC, like trajectory_store.py), and once the hour is over it is added to
+the day tile <YYYYmmdd>.npz. A query sums day tiles for whole days and hour
+tiles for the rest, so a month is about 30 small file reads:
+
+    python occupancy.py --camera cam0 --start "2026-10-01 00:00" --end "2026-10-19 00:00" \
+        --out heatmap.png --background background.jpg
+"""
+
+import argparse
+import glob
+import os
+import time
+import cv2
+import numpy as np
+
+GRID_ROWS = 36
+GRID_COLS = 64
+DWELL_BINS = (5, 30, 120, 600)   # seconds; stays are counted as <5 s, 5-30 s, ..., >=10 min
+MAX_STEP = 2.0                   # seconds; longer gaps between frames (outages, seeks) count as this
+
+
+def hour_stamp(t):
+    return time.strftime("%Y%m%d_%H", time.gmtime(t))
+
+
+def day_stamp(t):
+    return time.strftime("%Y%m%d", time.gmtime(t))
+
+
+class Tile:
+    """Summed occupancy for one hour or day."""
+
+    def __init__(self):
+        self.seconds = np.zeros((GRID_ROWS, GRID_COLS), np.float32)   # person-seconds per cell
+        self.visits = np.zeros((GRID_ROWS, GRID_COLS), np.uint32)     # track entries per cell
+        self.zones = {}     # zone -> [person-seconds, entries, dwell histogram (len(DWELL_BINS) + 1)]
+        self.hours = set()  # hour stamps summed into this tile
+
+    def zone(self, name):
+        if name not in self.zones:
+            self.zones[name] = [0.0, 0, np.zeros(len(DWELL_BINS) + 1, np.int64)]
+        return self.zones[name]
+
+    def add(self, other):
+        self.seconds += other.seconds
+        self.visits += other.visits
+        for (name, (seconds, entries, hist)) in other.zones.items():
+            zone = self.zone(name)
+            zone[0] += seconds
+            zone[1] += entries
+            zone[2] += hist
+        self.hours |= other.hours
+
+    def save(self, path):
+        names = sorted(self.zones)
+        tmp = path + ".tmp.npz"
+        np.savez_compressed(
+            tmp, seconds=self.seconds, visits=self.visits, zone_names=np.array(names, dtype=str),
+            zone_seconds=np.array([self.zones[n][0] for n in names], np.float64),
+            zone_entries=np.array([self.zones[n][1] for n in names], np.int64),
+            zone_dwell=np.array([self.zones[n][2] for n in names], np.int64).reshape(len(names), len(DWELL_BINS) + 1),
+            hours=np.array(sorted(self.hours), dtype=str))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        tile = cls()
+        with np.load(path) as data:
+            tile.seconds = data["seconds"]
+            tile.visits = data["visits"]
+            for (i, name) in enumerate(data["zone_names"].tolist()):
+                tile.zones[name] = [float(data["zone_seconds"][i]), int(data["zone_entries"][i]),
+                                    data["zone_dwell"][i].copy()]
+            tile.hours = set(data["hours"].tolist())
+        return tile
+
+
+class OccupancyAccumulator:
+    def __init__(self, root="occupancy", camera_id="cam0", flush_seconds=60.0):
+        self.dir = os.path.join(root, camera_id)
+        os.makedirs(self.dir, exist_ok=True)
+        self.flush_seconds = flush_seconds
+        self.frame_size = (0, 0)    # (w, h), set by the caller before updating
+        self.tile = None
+        self.hour = None
+        self.last_time = None
+        self.last_flush = time.time()
+        self.cells = {}             # object_id -> flat grid cell it was last seen in
+        self.stays = {}             # object_id -> (zone, time it entered the zone)
+        self.roll_up(hour_stamp(time.time()))
+
+    def update(self, tracks, now, wall=None):
+        """tracks: [(object_id, anchor point, zone)] for this frame; now: stream time in seconds."""
+        wall = time.time() if wall is None else wall
+        hour = hour_stamp(wall)
+        if hour != self.hour:
+            if self.tile is not None:
+                self.flush()
+                self.roll_up(hour, since=self.hour)
+            self.hour = hour
+            path = self._hour_path(hour)
+            # A restart within the hour continues its tile
+            self.tile = Tile.load(path) if os.path.exists(path) else Tile()
+            self.tile.hours.add(hour)
+        dt = 0.0 if self.last_time is None else min(max(now - self.last_time, 0.0), MAX_STEP)
+        self.last_time = now
+        tile = self.tile
+
+        (w, h) = self.frame_size
+        seen = set()
+        for (object_id, point, zone) in tracks:
+            seen.add(object_id)
+            col = min(max(int(point[0]) * GRID_COLS // max(w, 1), 0), GRID_COLS - 1)
+            row = min(max(int(point[1]) * GRID_ROWS // max(h, 1), 0), GRID_ROWS - 1)
+            tile.seconds[row, col] += dt
+            cell = row * GRID_COLS + col
+            if self.cells.get(object_id) != cell:
+                self.cells[object_id] = cell
+                tile.visits[row, col] += 1
+
+            stats = tile.zone(zone)
+            stats[0] += dt
+            stay = self.stays.get(object_id)
+            if stay is None or stay[0] != zone:
+                if stay is not None:
+                    self._end_stay(stay, now)
+                self.stays[object_id] = (zone, now)
+                stats[1] += 1
+
+        for object_id in [i for i in self.stays if i not in seen]:
+            self._end_stay(self.stays.pop(object_id), now)
+            self.cells.pop(object_id, None)
+
+        if time.time() - self.last_flush >= self.flush_seconds:
+            self.flush()
+
+    def _end_stay(self, stay, now):
+        (zone, start) = stay
+        self.tile.zone(zone)[2][np.searchsorted(DWELL_BINS, now - start, side="right")] += 1
+
+    def _hour_path(self, hour):
+        return os.path.join(self.dir, hour + ".npz")
+
+    def flush(self):
+        self.last_flush = time.time()
+        if self.tile is not None:
+            self.tile.save(self._hour_path(self.hour))
+
+    def roll_up(self, before, since=""):
+        """Add hour tiles in [since, before) to their day tiles unless they are in already (also after a crash)."""
+        days = {}
+        for path in sorted(glob.glob(os.path.join(self.dir, "????????_??.npz"))):
+            hour = os.path.basename(path)[:-4]
+            if since <= hour < before:
+                days.setdefault(hour[:8], []).append((hour, path))
+        for (day, hours) in days.items():
+            day_path = os.path.join(self.dir, day + ".npz")
+            tile = Tile.load(day_path) if os.path.exists(day_path) else Tile()
+            missing = [path for (hour, path) in hours if hour not in tile.hours]
+            for path in missing:
+                tile.add(Tile.load(path))
+            if missing:
+                tile.save(day_path)
+
+    def close(self):
+        for stay in self.stays.values():
+            self._end_stay(stay, self.last_time)
+        self.stays.clear()
+        self.flush()
+
+
+def query(root, camera_id, start, end):
+    """Tile summed over every hour overlapping [start, end] (epoch seconds)."""
+    folder = os.path.join(root, camera_id)
+    total = Tile()
+    t = int(start // 3600) * 3600
+    while t <= end:
+        day = day_stamp(t)
+        day_start = t - t % 86400
+        day_path = os.path.join(folder, day + ".npz")
+        if t == day_start and day_start + 86400 - 1 <= end and os.path.exists(day_path):
+            # Whole day in range: its tile, plus any hours not rolled into it yet
+            total.add(Tile.load(day_path))
+            for path in sorted(glob.glob(os.path.join(folder, day + "_??.npz"))):
+                if os.path.basename(path)[:-4] not in total.hours:
+                    total.add(Tile.load(path))
+            t = day_start + 86400
+            continue
+        path = os.path.join(folder, hour_stamp(t) + ".npz")
+        if os.path.exists(path):
+            total.add(Tile.load(path))
+        t += 3600
+    return total
+
+
+def render_heatmap(tile, background=None, size=(640, 360), alpha=0.6):
+    """Colour map of person-seconds per cell, blended over a background image of the scene."""
+    if background is not None:
+        size = (background.shape[1], background.shape[0])
+    scaled = cv2.GaussianBlur(np.log1p(tile.seconds).astype(np.float32), (0, 0), 0.8)   # log: a bench should not hide a path
+    scaled = cv2.resize(scaled / max(float(scaled.max()), 1e-9), size, interpolation=cv2.INTER_CUBIC).clip(0, 1)
+    heat = cv2.applyColorMap((scaled * 255).astype(np.uint8), cv2.COLORMAP_JET)
+    if background is None:
+        return heat
+    mask = (np.sqrt(scaled) * alpha)[..., None]   # fade out where little happened
+    return (background * (1 - mask) + heat * mask).astype(np.uint8)
+
+
+def dwell_labels():
+    edges = (0,) + DWELL_BINS
+    return [f"{a}-{b}s" for (a, b) in zip(edges, edges[1:])] + [f">={DWELL_BINS[-1]}s"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Occupancy heat map and dwell statistics")
+    parser.add_argument("--root", type=str, default="occupancy")
+    parser.add_argument("--camera", type=str, default="cam0")
+    parser.add_argument("--start", type=str, required=True, help="Local time, 'YYYY-mm-dd HH:MM'")
+    parser.add_argument("--end", type=str, required=True, help="Local time, 'YYYY-mm-dd HH:MM'")
+    parser.add_argument("--out", type=str, default="heatmap.png")
+    parser.add_argument("--background", type=str, default="background.jpg",
+                        help="Scene image to draw the heat map on (skipped if missing)")
+    args = parser.parse_args()
+
+    start = time.mktime(time.strptime(args.start, "%Y-%m-%d %H:%M"))
+    end = time.mktime(time.strptime(args.end, "%Y-%m-%d %H:%M"))
+    t0 = time.perf_counter()
+    tile = query(args.root, args.camera, start, end)
+    background = cv2.imread(args.background) if os.path.exists(args.background) else None
+    cv2.imwrite(args.out, render_heatmap(tile, background))
+    elapsed = time.perf_counter() - t0
+
+    print(f"[INFO] {len(tile.hours)} hour(s) of data, {tile.seconds.sum() / 3600:.1f} person-hours")
+    for (name, (seconds, entries, hist)) in sorted(tile.zones.items()):
+        stays = ", ".join(f"{label}: {n}" for (label, n) in zip(dwell_labels(), hist))
+        print(f"[INFO] {name}: {seconds / 60:.1f} person-minutes, {entries} entries ({stays})")
+    print(f"[INFO] Heat map written to {args.out} in {elapsed * 1000:.1f} ms")
@@ -0,0 +1,177 @@
+# snapshot_store.py
+"""
+Alert snapshot store: ROI crops, thumbnails and a disk budget.
+
+For each alert the store writes a tight crop around the intruder's box
+(at full resolution) and a downscaled thumbnail of the whole frame, as
+JPEG or WebP at a configurable quality. Every file is recorded in a small
+append-only index, so enforcing the disk budget (oldest first, optionally
+with a per-camera quota) never has to walk the directory.
+
+Cameras in one process (inference_scheduler.py) share a single store, so
+one index and one budget cover them all; save() is safe to call from
+several threads.
+"""
+
+import collections
+import json
+import os
+import threading
+import time
+import cv2
+
+INDEX_NAME = "index.jsonl"
+
+
+class SnapshotStore:
+    def __init__(self, root="snapshots", budget_bytes=500 * 1024 * 1024, camera_quota_bytes=None,
+                 fmt="jpg", quality=85, thumb_width=320, crop_margin=0.25):
+        if fmt not in ("jpg", "webp"):
+            raise ValueError(f"Unsupported snapshot format: {fmt}")
+        self.root = root
+        self.budget_bytes = budget_bytes
+        self.camera_quota_bytes = camera_quota_bytes
+        self.fmt = fmt
+        self.params = ([cv2.IMWRITE_JPEG_QUALITY, quality] if fmt == "jpg"
+                       else [cv2.IMWRITE_WEBP_QUALITY, quality])
+        self.thumb_width = thumb_width
+        self.crop_margin = crop_margin
+
+        os.makedirs(root, exist_ok=True)
+        self.index_path = os.path.join(root, INDEX_NAME)
+        self.entries = collections.deque()   # oldest first: {"path", "camera", "size", "t"}
+        self.camera_bytes = collections.Counter()
+        self.total_bytes = 0
+        self.evicted_since_rewrite = 0
+        self.seq = 0
+        self._lock = threading.Lock()   # camera threads sharing the store
+        self._load_index()
+        self.index = open(self.index_path, "a")
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return
+        live = collections.OrderedDict()
+        with open(self.index_path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get("evicted"):
+                    live.pop(record["path"], None)
+                else:
+                    live[record["path"]] = record
+                    self.seq = max(self.seq, record.get("seq", 0))
+        for record in live.values():
+            self._track(record)
+        # Start with a compact index
+        self._rewrite_index()
+
+    def _rewrite_index(self):
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w") as f:
+            for record in self.entries:
+                f.write(json.dumps(record) + "\n")
+        os.replace(tmp, self.index_path)
+        self.evicted_since_rewrite = 0
+
+    def _track(self, record):
+        self.entries.append(record)
+        self.camera_bytes[record["camera"]] += record["size"]
+        self.total_bytes += record["size"]
+
+    def _write(self, image, camera_id, object_id, kind, stamp):
+        ok, buf = cv2.imencode("." + self.fmt, image, self.params)
+        if not ok:
+            return None
+        data = buf.tobytes()
+        while True:
+            # Millisecond timestamp plus a store-wide sequence number never repeats;
+            # exclusive create guards against another process sharing the directory
+            self.seq += 1
+            name = f"{camera_id}_{stamp}_obj{object_id}_{self.seq:06d}_{kind}.{self.fmt}"
+            path = os.path.join(self.root, name)
+            try:
+                with open(path, "xb") as f:
+                    f.write(data)
+                break
+            except FileExistsError:
+                continue
+        record = {"path": name, "camera": camera_id, "size": len(data), "t": time.time(), "seq": self.seq}
+        self.index.write(json.dumps(record) + "\n")
+        self._track(record)
+        return path
+
+    def crop_box(self, shape, box):
+        (h, w) = shape[:2]
+        (startX, startY, endX, endY) = box
+        mx = int((endX - startX) * self.crop_margin)
+        my = int((endY - startY) * self.crop_margin)
+        return (max(0, startX - mx), max(0, startY - my), min(w, endX + mx), min(h, endY + my))
+
+    def save(self, frame, box, camera_id, object_id):
+        """Store crop + thumbnail for one alert. Returns the written paths."""
+        with self._lock:
+            return self._save(frame, box, camera_id, object_id)
+
+    def _save(self, frame, box, camera_id, object_id):
+        t = time.time()
+        stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(t)) + f"_{int(t * 1000) % 1000:03d}"
+        paths = []
+
+        if box is not None:
+            (x1, y1, x2, y2) = self.crop_box(frame.shape, box)
+            if x2 > x1 and y2 > y1:
+                paths.append(self._write(frame[y1:y2, x1:x2], camera_id, object_id, "crop", stamp))
+
+        (h, w) = frame.shape[:2]
+        thumb = frame
+        if self.thumb_width and w > self.thumb_width:
+            thumb = cv2.resize(frame, (self.thumb_width, int(h * self.thumb_width / w)), interpolation=cv2.INTER_AREA)
+        paths.append(self._write(thumb, camera_id, object_id, "thumb", stamp))
+
+        self.index.flush()
+        self.enforce_budget()
+        return [p for p in paths if p is not None]
+
+    def _evict(self, record):
+        try:
+            os.remove(os.path.join(self.root, record["path"]))
+        except FileNotFoundError:
+            pass
+        self.camera_bytes[record["camera"]] -= record["size"]
+        self.total_bytes -= record["size"]
+        self.index.write(json.dumps({"path": record["path"], "evicted": True}) + "\n")
+        self.evicted_since_rewrite += 1
+
+    def enforce_budget(self):
+        evicted = 0
+        if self.camera_quota_bytes is not None:
+            over = {c for (c, size) in self.camera_bytes.items() if size > self.camera_quota_bytes}
+            if over:
+                # Oldest first within each camera that is over its quota
+                kept = collections.deque()
+                for record in self.entries:
+                    camera = record["camera"]
+                    if camera in over and self.camera_bytes[camera] > self.camera_quota_bytes:
+                        self._evict(record)
+                        evicted += 1
+                    else:
+                        kept.append(record)
+                self.entries = kept
+        while self.entries and self.total_bytes > self.budget_bytes:
+            self._evict(self.entries.popleft())
+            evicted += 1
+
+        if evicted:
+            self.index.flush()
+            if self.evicted_since_rewrite > max(100, len(self.entries)):
+                self.index.close()
+                self._rewrite_index()
+                self.index = open(self.index_path, "a")
+        return evicted
+
+    def close(self):
+        with self._lock:
+            self.index.close()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Long-run soak test for tracker and alert state.
+
+Drives simulated hours or days of synthetic track churn (people walking
+through the scene, some crossing the perimeter) through the real
+PerimeterIntrusionSystem zone/alert pipeline as fast as the CPU allows,
+with the detector replaced by the synthetic walkers. RSS and the sizes of
+all per-track tables are sampled along the way; the run fails (exit code 1)
+if either keeps growing once the scene has reached a steady state.
+
+    python soak_test.py --hours 48 --fps 1
+"""
+
+import argparse
+import contextlib
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+import numpy as np
+from frame_health import FrameHealthMonitor
+from main import PerimeterIntrusionSystem
+from snapshot_store import SnapshotStore
+
+FRAME_SIZE = (320, 240)
+
+
+def rss_mb():
+    """Resident set size of this process in MB."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError):
+        import resource
+        # ru_maxrss is a high-water mark (KB on Linux), good enough off Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+class SyntheticChurn:
+    """Walkers that enter at a frame edge, cross the scene and leave."""
+
+    def __init__(self, width, height, spawn_prob=0.05, max_walkers=12, dropout=0.05, seed=0):
+        self.width = width
+        self.height = height
+        self.spawn_prob = spawn_prob
+        self.max_walkers = max_walkers
+        self.dropout = dropout
+        self.rng = random.Random(seed)
+        self.walkers = []   # [x, y, vx, vy, w, h]
+
+    def step(self):
+        if len(self.walkers) < self.max_walkers and self.rng.random() < self.spawn_prob:
+            y = self.rng.uniform(0.1, 0.8) * self.height
+            speed = self.rng.uniform(2, 8)
+            if self.rng.random() < 0.5:
+                self.walkers.append([0.0, y, speed, self.rng.uniform(-1, 1), 16, 36])
+            else:
+                self.walkers.append([float(self.width), y, -speed, self.rng.uniform(-1, 1), 16, 36])
+
+        rects, alive = [], []
+        for walker in self.walkers:
+            walker[0] += walker[2]
+            walker[1] += walker[3]
+            (x, y, _, _, w, h) = walker
+            if -w <= x <= self.width + w and -h <= y <= self.height + h:
+                alive.append(walker)
+                if self.rng.random() >= self.dropout:
+                    rects.append((int(x - w / 2), int(y - h / 2), int(x + w / 2), int(y + h / 2)))
+        self.walkers = alive
+        return rects
+
+
+class SoakSystem(PerimeterIntrusionSystem):
+    """The real pipeline with the detector swapped for synthetic churn."""
+
+    def __init__(self, churn, workdir):
+        self.churn = churn
+        # Small budget so eviction reaches its steady state early in the run
+        snapshots = SnapshotStore(os.path.join(workdir, "snapshots"), budget_bytes=256 * 1024)
+        super().__init__(None, adaptive=False, headless=True, snapshots=snapshots)
+        self.log_file = os.path.join(workdir, "alerts_log.txt")
+        # The synthetic frames are blank; never treat them as repeats or a covered lens
+        self.health = FrameHealthMonitor(freeze_seconds=float("inf"), diff_threshold=-1.0)
+
+    def load_mobilenet_ssd(self):
+        self.net = None
+        self.CLASSES = []
+
+    def detect_objects(self, frame):
+        return self.churn.step()
+
+
+def sample(system, frame_index):
+    return {
+        "frame": frame_index,
+        "rss_mb": rss_mb(),
+        "tracks": len(system.tracker.objects),
+        "states": len(system.tracker.states),
+        "last_points": len(system.last_points),
+        "snapshots": len(system.snapshots.entries),
+        **{f"registry.{name}": size for (name, size) in system.registry.sizes().items()},
+    }
+
+
+def check_growth(samples, max_growth_mb):
+    """Compare the second half of the run against the first (after warm-up)."""
+    warm = samples[len(samples) // 10:]
+    half = len(warm) // 2
+    if half < 2:
+        return ["not enough samples; run longer"]
+    early, late = warm[:half], warm[half:]
+    failures = []
+
+    rss_growth = max(s["rss_mb"] for s in late) - max(s["rss_mb"] for s in early)
+    if rss_growth > max_growth_mb:
+        failures.append(f"RSS grew {rss_growth:.1f} MB after warm-up (limit {max_growth_mb} MB)")
+
+    for key in early[0]:
+        if key in ("frame", "rss_mb"):
+            continue
+        before = max(s.get(key, 0) for s in early)
+        after = max(s.get(key, 0) for s in late)
+        if after > 1.5 * before + 10:
+            failures.append(f"{key} grew from {before} to {after}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak test for bounded tracker/alert memory")
+    parser.add_argument("--hours", type=float, default=24.0, help="Simulated duration")
+    parser.add_argument("--fps", type=float, default=1.0, help="Analyzed frames per simulated second")
+    parser.add_argument("--samples", type=int, default=200, help="Number of RSS/table samples")
+    parser.add_argument("--max-growth-mb", type=float, default=16.0, help="Allowed RSS growth after warm-up")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    total = int(args.hours * 3600 * args.fps)
+    every = max(1, total // args.samples)
+    (w, h) = FRAME_SIZE
+    frame = np.zeros((h, w, 3), np.uint8)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        system = SoakSystem(SyntheticChurn(w, h, seed=args.seed), workdir)
+        system.polygon = [(w // 3, h // 4), (2 * w // 3, h // 4), (2 * w // 3, 3 * h // 4), (w // 3, 3 * h // 4)]
+        print(f"[INFO] Soak: {args.hours:g} h at {args.fps:g} fps = {total} frames")
+
+        samples = []
+        start = time.perf_counter()
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            for i in range(total):
+                frame[...] = 0
+                system.frame_count += 1
+                system.analyze_frame(frame)
+                if i % every == 0:
+                    if len(samples) % 20 == 0:
+                        gc.collect()
+                    samples.append(sample(system, i))
+        elapsed = time.perf_counter() - start
+
+        last = samples[-1]
+        print(f"[INFO] {total} frames in {elapsed:.1f}s ({total / max(elapsed, 1e-9):.0f} fps, "
+              f"{args.hours * 3600 / max(elapsed, 1e-9):.0f}x real time), {system.alert_count} alerts")
+        print(f"[INFO] Final: " + ", ".join(f"{k}={v:.1f}" if isinstance(v, float) else f"{k}={v}"
+                                           for (k, v) in last.items()))
+        print(f"[INFO] Next object ID: {system.tracker.nextObjectID}")
+
+        failures = check_growth(samples, args.max_growth_mb)
+        system.snapshots.close()
+
+    if failures:
+        for failure in failures:
+            print(f"[FAIL] {failure}")
+        sys.exit(1)
+    print("[PASS] Memory and per-track tables stayed flat")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# static_suppression.py
+"""
+Learned suppression of static false-positive "person" detections.
+
+The detector keeps reporting people on posters, mannequins and coats on
+hooks. StaticSuppressor keeps a coarse per-camera heat map over detection
+centres: a cell gains heat for every second a detection sits in it and
+loses it exponentially over expiry_seconds. People walking through only
+warm a cell briefly; a fixed object keeps it hot. Once a cell has seen
+static_seconds of near-continuous presence, detections centred there
+whose box also matches the cell's learned box are dropped before they
+reach the tracker. Heat is capped, so a removed poster is forgotten after
+about expiry_seconds * ln(2).
+
+Suppression must never hide an intruder who simply stands still. The
+caller passes the live tracks and whether each detection is inside the
+zone. A detection inside the zone, or matching a track that is already
+INSIDE, is never dropped and never warms the map. A detection matching a
+track that walked in from elsewhere (more than MOVED_PX from where it
+first appeared) is kept too, and does not warm its cell. So only objects
+that were static from the moment they were first seen can become static
+cells.
+
+The map is saved per camera as a small compressed .npz (float16 heat,
+int16 reference boxes) and reloaded on the next start.
+"""
+
+import os
+import numpy as np
+from kalman_tracker import iou_matrix
+
+REF_SMOOTHING = 0.1   # EMA weight of a new box in a cell's reference box
+MAX_STEP = 10.0       # seconds; longer gaps between frames (restarts, seeks) count as this
+TRACK_IOU = 0.3       # a detection belongs to a live track if their boxes overlap this much
+MOVED_PX = 40         # a track that has travelled further than this from where it appeared is a person
+
+
+def box_iou(a, b):
+    """IoU between matching rows of two (N, 4) box arrays."""
+    x1 = np.maximum(a[:, 0], b[:, 0])
+    y1 = np.maximum(a[:, 1], b[:, 1])
+    x2 = np.minimum(a[:, 2], b[:, 2])
+    y2 = np.minimum(a[:, 3], b[:, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a + area_b - inter, 1e-9)
+
+
+class StaticSuppressor:
+    def __init__(self, path=None, cell=16, static_seconds=300.0, expiry_seconds=1800.0, min_iou=0.6):
+        self.path = path
+        self.cell = cell
+        self.static_seconds = static_seconds
+        self.expiry_seconds = expiry_seconds
+        self.min_iou = min_iou
+        self.heat = None     # (rows, cols) seconds of recent presence per cell
+        self.ref = None      # (rows, cols, 4) smoothed box of detections in each cell
+        self.last_time = None
+        self.suppressed = 0
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    def _grid_shape(self, frame_shape):
+        return (-(-frame_shape[0] // self.cell), -(-frame_shape[1] // self.cell))
+
+    def _reset(self, grid_shape):
+        self.heat = np.zeros(grid_shape, np.float32)
+        self.ref = np.zeros(grid_shape + (4,), np.float32)
+
+    def load(self):
+        try:
+            with np.load(self.path) as data:
+                self.heat = data["heat"].astype(np.float32)
+                self.ref = data["ref"].astype(np.float32)
+                self.cell = int(data["cell"])
+        except (OSError, KeyError, ValueError) as e:
+            print(f"[WARN] Ignoring static map {self.path}: {e}")
+            self.heat = self.ref = None
+
+    def save(self):
+        if self.path is None or self.heat is None:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = self.path + ".tmp.npz"
+        np.savez_compressed(tmp, heat=self.heat.astype(np.float16),
+                            ref=np.clip(self.ref, -32768, 32767).astype(np.int16), cell=self.cell)
+        os.replace(tmp, self.path)
+
+    def static_cells(self):
+        return int((self.heat >= self.static_seconds).sum()) if self.heat is not None else 0
+
+    def filter(self, rects, frame_shape, now, tracks=None, inside=None):
+        """
+        Update the map with this frame's detections and return the ones to keep.
+        tracks: [(box, is_inside, travelled_px)] for the live tracks; inside:
+        per detection, whether it is in the zone. Both are optional.
+        """
+        grid_shape = self._grid_shape(frame_shape)
+        if self.heat is None or self.heat.shape != grid_shape:
+            self._reset(grid_shape)
+        dt = 0.0 if self.last_time is None else min(max(now - self.last_time, 0.0), MAX_STEP)
+        self.last_time = now
+        if dt > 0:
+            self.heat *= np.float32(np.exp(-dt / self.expiry_seconds))
+        if len(rects) == 0:
+            return rects
+
+        boxes = np.array(rects, np.float32).reshape(-1, 4)
+        cx = np.clip(((boxes[:, 0] + boxes[:, 2]) / 2 // self.cell).astype(int), 0, grid_shape[1] - 1)
+        cy = np.clip(((boxes[:, 1] + boxes[:, 3]) / 2 // self.cell).astype(int), 0, grid_shape[0] - 1)
+
+        (protect, moved) = self._exemptions(boxes, tracks, inside)
+
+        # Decide against the map as it was, then learn from every detection that
+        # may be static (suppressed ones included, so a static object keeps its cell hot)
+        static = ((self.heat[cy, cx] >= self.static_seconds) & (box_iou(boxes, self.ref[cy, cx]) >= self.min_iou)
+                  & ~protect & ~moved)
+
+        learn = ~protect & ~moved
+        if learn.any():
+            (ly, lx, lboxes) = (cy[learn], cx[learn], boxes[learn])
+            fresh = self.heat[ly, lx] <= 0
+            self.ref[ly, lx] = np.where(fresh[:, None], lboxes,
+                                        self.ref[ly, lx] * (1 - REF_SMOOTHING) + lboxes * REF_SMOOTHING)
+            cells = np.unique(np.stack([ly, lx], axis=1), axis=0)
+            self.heat[cells[:, 0], cells[:, 1]] = np.minimum(self.heat[cells[:, 0], cells[:, 1]] + dt,
+                                                             2 * self.static_seconds)
+
+        self.suppressed += int(static.sum())
+        return [r for (r, s) in zip(rects, static) if not s]
+
+    def _exemptions(self, boxes, tracks, inside):
+        """(protect, moved) per detection: in the zone or on an INSIDE track; on a track that walked in."""
+        protect = np.zeros(len(boxes), bool) if inside is None else np.asarray(inside, bool).copy()
+        moved = np.zeros(len(boxes), bool)
+        if tracks:
+            track_boxes = np.array([t[0] for t in tracks], np.float32).reshape(-1, 4)
+            iou = iou_matrix(boxes, track_boxes)
+            best = iou.argmax(axis=1)
+            matched = iou[np.arange(len(boxes)), best] >= TRACK_IOU
+            track_inside = np.array([bool(t[1]) for t in tracks])
+            travelled = np.array([t[2] for t in tracks], np.float32)
+            protect |= matched & track_inside[best]
+            moved = matched & (travelled[best] > MOVED_PX)
+        return protect, moved
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Random weights for the MobileNet-SSD prototxt.
+
+Timing work (CPU calibration, input-size tuning) only needs a network with
+the right shape, not a trained one. write_synthetic_caffemodel() reads the
+layer definitions from the prototxt and writes a .caffemodel with
+MSRA-initialized convolution weights, encoded directly in the protobuf wire
+format, so no Caffe or protobuf package is needed. Its detections are
+meaningless, but its cost per forward pass matches the real model.
+
+    python synthetic_model.py models/MobileNetSSD_deploy.prototxt /tmp/synthetic.caffemodel
+"""
+
+import os
+import re
+import struct
+import sys
+import tempfile
+import numpy as np
+
+
+def _varint(n):
+    out = bytearray()
+    while True:
+        byte = n & 0x7F
+        n >>= 7
+        if n:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _field(number, payload):
+    """Length-delimited protobuf field."""
+    return _varint(number << 3 | 2) + _varint(len(payload)) + payload
+
+
+def _blob(array):
+    # BlobProto: shape (7) = BlobShape { dim (1), packed }, data (5), packed floats
+    dims = b"".join(_varint(d) for d in array.shape)
+    return _field(7, _field(1, dims)) + _field(5, struct.pack(f"<{array.size}f", *array.ravel()))
+
+
+def parse_conv_layers(prototxt_path):
+    """[(name, num_output, in_channels, kernel, group, bias)] for every Convolution layer, in order."""
+    text = open(prototxt_path).read()
+    blocks = re.split(r"\nlayer\s*\{", text)
+    channels = {}
+    match = re.search(r"input_shape\s*\{\s*dim:\s*\d+\s*dim:\s*(\d+)", text)
+    input_name = re.search(r'input:\s*"([^"]+)"', text)
+    if match and input_name:
+        channels[input_name.group(1)] = int(match.group(1))
+
+    convs = []
+    for block in blocks[1:]:
+        name = re.search(r'name:\s*"([^"]+)"', block).group(1)
+        kind = re.search(r'type:\s*"([^"]+)"', block).group(1)
+        bottoms = re.findall(r'bottom:\s*"([^"]+)"', block)
+        tops = re.findall(r'top:\s*"([^"]+)"', block)
+        if kind == "Convolution":
+            num_output = int(re.search(r"num_output:\s*(\d+)", block).group(1))
+            kernel = int(re.search(r"kernel_size:\s*(\d+)", block).group(1))
+            group = re.search(r"group:\s*(\d+)", block)
+            group = int(group.group(1)) if group else 1
+            bias = not re.search(r"bias_term:\s*false", block)
+            convs.append((name, num_output, channels[bottoms[0]], kernel, group, bias))
+            channels[tops[0]] = num_output
+        elif bottoms and bottoms[0] in channels:
+            # In-place and shape-preserving layers (ReLU, ...) keep the channel count
+            for top in tops:
+                channels.setdefault(top, channels[bottoms[0]])
+    return convs
+
+
+def write_synthetic_caffemodel(prototxt_path, out_path, seed=0):
+    rng = np.random.default_rng(seed)
+    layers = []
+    for (name, num_output, in_channels, kernel, group, bias) in parse_conv_layers(prototxt_path):
+        fan_in = in_channels // group * kernel * kernel
+        weights = rng.normal(0, np.sqrt(2.0 / fan_in), (num_output, in_channels // group, kernel, kernel))
+        layer = _field(1, name.encode()) + _field(2, b"Convolution") + _field(7, _blob(weights.astype(np.float32)))
+        if bias:
+            layer += _field(7, _blob(np.zeros(num_output, np.float32)))
+        layers.append(_field(100, layer))   # NetParameter.layer
+    with open(out_path, "wb") as f:
+        f.write(b"".join(layers))
+    return out_path
+
+
+def load_synthetic_net(prototxt_path, seed=0):
+    import model_cache
+    path = os.path.join(tempfile.gettempdir(), f"synthetic_{os.path.basename(prototxt_path)}_{seed}.caffemodel")
+    if not os.path.exists(path):
+        write_synthetic_caffemodel(prototxt_path, path, seed)
+    return model_cache.load_net(prototxt_path, path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("usage: python synthetic_model.py PROTOTXT OUT.caffemodel")
+        sys.exit(1)
+    write_synthetic_caffemodel(sys.argv[1], sys.argv[2])
+    print(f"[INFO] Wrote {sys.argv[2]}")
@@ -26,13 +26,6 @@ def test_imports():
         print(f"✗ NumPy import failed: {e}")
         return False
     
-    try:
-        import scipy
-        print("✓ SciPy imported successfully")
-    except ImportError as e:
-        print(f"✗ SciPy import failed: {e}")
-        return False
-    
     try:
         import imutils
         print("✓ imutils imported successfully")
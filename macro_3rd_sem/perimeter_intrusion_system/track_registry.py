@@ -0,0 +1,45 @@
+# track_registry.py
+"""
+One place for every per-track side table.
+
+Anything that keeps data keyed by object ID outside the tracker (debounce
+counters, pre-alert flags, ...) asks the registry for its table instead of
+creating a bare dict or set. The tracker calls on_deregister() when it
+drops an ID, and the entry disappears from every table at once, so these
+structures never outlive the tracks they describe.
+"""
+
+
+class TrackRegistry:
+    def __init__(self):
+        self.tables = {}
+
+    def table(self, name):
+        """A dict keyed by object ID, pruned on deregister."""
+        return self.tables.setdefault(name, {})
+
+    def set(self, name):
+        """A set of object IDs, pruned on deregister."""
+        return self.tables.setdefault(name, set())
+
+    def on_deregister(self, object_id):
+        for table in self.tables.values():
+            if isinstance(table, set):
+                table.discard(object_id)
+            else:
+                table.pop(object_id, None)
+
+    def sizes(self):
+        return {name: len(table) for (name, table) in self.tables.items()}
+
+
+# Object IDs wrap around here instead of growing forever
+MAX_OBJECT_ID = 2 ** 31 - 1
+
+
+def allocate_id(next_id, live_ids):
+    """Returns (id to use, next candidate), skipping IDs that are still live."""
+    object_id = next_id
+    while object_id in live_ids:
+        object_id = (object_id + 1) % (MAX_OBJECT_ID + 1)
+    return object_id, (object_id + 1) % (MAX_OBJECT_ID + 1)
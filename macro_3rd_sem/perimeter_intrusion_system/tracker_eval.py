@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Ground-truth simulator and tracker / alert accuracy evaluation.
+
+GroundTruthSimulator walks thousands of people through a scene with a
+perimeter: some cross it, some pass by or linger next to it, a few run.
+It hands out detector-like boxes with the failures real detectors have:
+position noise, missed detections, people hidden behind pillars and behind
+each other, and short-lived false positives. Every box remembers which
+person it came from.
+
+The boxes go through the real PerimeterIntrusionSystem (tracker, zone
+test, crossing engine, alerting) with only the detector replaced, as in
+soak_test.py. The run is scored against the ground truth:
+
+    ID switches      a person's detections handed from one track ID to another
+    on time / late   perimeter entries alerted within --late-s of the real
+                     entry, or later (up to --match-s)
+    missed           entries with no alert within --match-s
+    duplicate        extra alerts for an entry that was already alerted
+    false alerts     alerts that match no real entry (false positives, noise)
+
+alongside the cost per analyzed frame (tracker update and the whole zone /
+alert path), so a tracker or debounce change is judged on both.
+
+    python tracker_eval.py --people 2000 --fps 10 --noise 4 --miss 0.05
+"""
+
+import argparse
+import contextlib
+import math
+import os
+import random
+import tempfile
+import time
+import cv2
+import numpy as np
+from frame_health import FrameHealthMonitor
+from kalman_tracker import KalmanTracker, iou_matrix
+from main import PerimeterIntrusionSystem
+from snapshot_store import SnapshotStore
+
+FRAME_SIZE = (640, 360)
+FALSE_POSITIVE = -1
+POINT_ATTEMPTS = 200   # random tries for a route point before the person just walks past
+
+
+class Person:
+    def __init__(self, person_id, waypoints, speed, height, pauses):
+        self.id = person_id
+        self.waypoints = waypoints   # [(x, y), ...] anchor path
+        self.speed = speed           # pixels per second
+        self.height = height         # box height in pixels
+        self.pauses = pauses         # {waypoint index: seconds standing there}
+        self.leg = 0
+        self.wait = 0.0
+        self.pos = np.array(waypoints[0], float)
+        self.done = False
+
+    def step(self, dt):
+        while dt > 0 and not self.done:
+            if self.wait > 0:
+                used = min(self.wait, dt)
+                self.wait -= used
+                dt -= used
+                continue
+            target = np.array(self.waypoints[self.leg + 1], float)
+            gap = float(np.hypot(*(target - self.pos)))
+            if gap > self.speed * dt:
+                self.pos += (target - self.pos) / gap * self.speed * dt
+                return
+            self.pos = target
+            dt -= gap / self.speed
+            self.leg += 1
+            self.wait = self.pauses.get(self.leg, 0.0)
+            if self.leg == len(self.waypoints) - 1:
+                self.done = True
+
+    def box(self):
+        """Box whose box_to_anchor() is the current position."""
+        (h, w) = (self.height, self.height * 0.4)
+        (x, y) = (self.pos[0], self.pos[1] - 0.2 * h)
+        return (x - w / 2, y - h / 2, x + w / 2, y + h / 2)
+
+
+class GroundTruthSimulator:
+    def __init__(self, width, height, polygon, people=1000, max_concurrent=12, fps=10.0, seed=0,
+                 noise=3.0, miss=0.05, false_positives=0.02, occluders=None,
+                 cross=0.35, linger=0.25, run=0.05):
+        self.width = width
+        self.height = height
+        self.polygon = np.array(polygon, np.int32)
+        self.people_total = people
+        self.max_concurrent = max_concurrent
+        self.dt = 1.0 / fps
+        self.rng = random.Random(seed)
+        self.noise = noise                      # box jitter (pixels, std dev)
+        self.miss = miss                        # probability a visible person is not detected
+        self.false_positives = false_positives  # new false detections per frame
+        self.mix = (cross, linger, run)         # route probabilities; the rest walk past
+        # Pillars: people whose anchor is behind one are not detected
+        self.occluders = occluders if occluders is not None else [
+            (int(width * 0.12), 0, int(width * 0.17), height), (int(width * 0.8), 0, int(width * 0.84), height)]
+        self.spawned = 0
+        self.active = []
+        self.ghosts = []       # [box, frames left] false positives
+        self.frame = 0
+
+    def inside(self, point):
+        return cv2.pointPolygonTest(self.polygon, (float(point[0]), float(point[1])), False) >= 0
+
+    def _edge_point(self):
+        side = self.rng.randrange(4)
+        (w, h) = (self.width, self.height)
+        if side == 0:
+            return (-10.0, self.rng.uniform(0.3, 1.0) * h)
+        if side == 1:
+            return (w + 10.0, self.rng.uniform(0.3, 1.0) * h)
+        if side == 2:
+            return (self.rng.uniform(0, w), h + 10.0)
+        return (self.rng.uniform(0, w), self.rng.uniform(0.3, 0.4) * h)   # far end of the scene
+
+    def _inside_point(self):
+        """A random point inside the perimeter, or None for a degenerate (e.g. collinear) polygon."""
+        (x, y, w, h) = cv2.boundingRect(self.polygon)
+        for _ in range(POINT_ATTEMPTS):
+            p = (self.rng.uniform(x, x + w), self.rng.uniform(y, y + h))
+            if self.inside(p):
+                return p
+        return None
+
+    def _near_fence_point(self):
+        """A point just outside the perimeter (within ~30 px of its boundary), or None if there is no room."""
+        for _ in range(POINT_ATTEMPTS):
+            p = (self.rng.uniform(0, self.width), self.rng.uniform(0.3 * self.height, self.height))
+            d = cv2.pointPolygonTest(self.polygon, p, True)
+            if -30 <= d < -5:
+                return p
+        return None
+
+    def _spawn(self):
+        r = self.rng.random()
+        (cross, linger, run) = self.mix
+        start, end = self._edge_point(), self._edge_point()
+        speed = self.rng.uniform(40, 110)
+        pauses = {}
+        waypoints = [start, end]   # walk past, also when no route point can be found
+        if r < cross:
+            point = self._inside_point()
+            if point is not None:
+                waypoints = [start, point, end]
+                if self.rng.random() < 0.3:
+                    pauses[1] = self.rng.uniform(1, 10)
+        elif r < cross + linger:
+            point = self._near_fence_point()
+            if point is not None:
+                waypoints = [start, point, end]
+                pauses[1] = self.rng.uniform(2, 30)
+        elif r < cross + linger + run:
+            point = self._inside_point()
+            if point is not None:
+                waypoints = [start, point, end]
+                speed = self.rng.uniform(250, 400)
+        height = self.rng.uniform(0.17, 0.33) * self.height
+        self.active.append(Person(self.spawned, waypoints, speed, height, pauses))
+        self.spawned += 1
+
+    def finished(self):
+        return self.spawned >= self.people_total and not self.active
+
+    def step(self):
+        """
+        Advance one frame. Returns (rects, sources, truth): the detector output,
+        the person each rect came from (FALSE_POSITIVE for ghosts), and
+        [(person_id, anchor point, inside)] for everyone in the scene.
+        """
+        self.frame += 1
+        if (self.spawned < self.people_total and len(self.active) < self.max_concurrent
+                and self.rng.random() < 0.2):
+            self._spawn()
+        for person in self.active:
+            person.step(self.dt)
+        self.active = [p for p in self.active if not p.done]
+
+        truth = [(p.id, p.pos.copy(), self.inside(p.pos)) for p in self.active]
+        boxes = [p.box() for p in self.active]
+        visible = [self.rng.random() >= self.miss
+                   and not any(x1 <= p.pos[0] <= x2 and y1 <= p.pos[1] <= y2 for (x1, y1, x2, y2) in self.occluders)
+                   for p in self.active]
+        if len(boxes) > 1:
+            # The person further away (feet higher up) is hidden behind a closer one
+            iou = iou_matrix(np.array(boxes), np.array(boxes))
+            for i in range(len(boxes)):
+                for j in range(len(boxes)):
+                    if i != j and iou[i, j] > 0.4 and boxes[i][3] < boxes[j][3]:
+                        visible[i] = False
+
+        rects, sources = [], []
+        for (person, box, seen) in zip(self.active, boxes, visible):
+            if seen:
+                jitter = [self.rng.gauss(0, self.noise) for _ in range(4)]
+                rects.append(tuple(int(v + d) for (v, d) in zip(box, jitter)))
+                sources.append(person.id)
+
+        if self.rng.random() < self.false_positives:
+            (x, y) = (self.rng.uniform(0, self.width - 40), self.rng.uniform(0.3, 0.8) * self.height)
+            h = self.rng.uniform(0.15, 0.3) * self.height
+            self.ghosts.append([(int(x), int(y), int(x + 0.4 * h), int(y + h)), self.rng.randint(1, 5)])
+        for ghost in self.ghosts:
+            rects.append(ghost[0])
+            sources.append(FALSE_POSITIVE)
+            ghost[1] -= 1
+        self.ghosts = [g for g in self.ghosts if g[1] > 0]
+        return rects, sources, truth
+
+
+class EvalSystem(PerimeterIntrusionSystem):
+    """The real pipeline with the detector swapped for the simulator."""
+
+    def __init__(self, simulator, workdir, max_disappeared=30, max_distance=150):
+        self.simulator = simulator
+        snapshots = SnapshotStore(os.path.join(workdir, "snapshots"), budget_bytes=256 * 1024)
+        super().__init__(None, adaptive=False, headless=True, snapshots=snapshots)
+        self.log_file = os.path.join(workdir, "alerts_log.txt")
+        self.health = FrameHealthMonitor(freeze_seconds=float("inf"), diff_threshold=-1.0)
+        self.tracker = KalmanTracker(max_disappeared, max_distance, registry=self.registry)
+        self.fps = 1.0 / simulator.dt
+        self.sources = []
+        self.truth = []
+        self.alerts = []         # (frame, object_id, person_id or None)
+        self.track_person = {}   # object_id -> person its last matched detection came from
+
+    def load_mobilenet_ssd(self):
+        self.net = None
+        self.CLASSES = []
+
+    def detect_objects(self, frame):
+        (rects, self.sources, self.truth) = self.simulator.step()
+        return rects
+
+    def log_alert(self, object_id, timestamp):
+        super().log_alert(object_id, timestamp)
+        col = self.tracker.matches.get(object_id)
+        person = self.sources[col] if col is not None else self.track_person.get(object_id)
+        self.alerts.append((self.simulator.frame, object_id, person))
+
+    def after_frame(self):
+        for (object_id, col) in self.tracker.matches.items():
+            self.track_person[object_id] = self.sources[col]
+        for object_id in [i for i in self.track_person if i not in self.tracker.tracks]:
+            del self.track_person[object_id]
+
+
+def timed(function, sink):
+    def wrapper(*args):
+        start = time.perf_counter()
+        result = function(*args)
+        sink.append(time.perf_counter() - start)
+        return result
+    return wrapper
+
+
+def evaluate(system, late_frames, match_frames, early_frames):
+    """Run the simulation to the end through system and score it."""
+    sim = system.simulator
+    track_times, frame_times = [], []
+    system.tracker.update = timed(system.tracker.update, track_times)
+    frame = np.zeros((sim.height, sim.width, 3), np.uint8)
+
+    entries = []            # [person, frame, alerted frame or None]
+    was_inside = {}
+    last_track = {}         # person -> last track ID its detections went to
+    switches = 0
+    tracks_per_person = {}
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        while not sim.finished():
+            system.frame_count += 1
+            start = time.perf_counter()
+            system.analyze_frame(frame)
+            frame_times.append(time.perf_counter() - start)
+            system.after_frame()
+
+            for (person, _, inside) in system.truth:
+                if inside and was_inside.get(person) is False:
+                    entries.append([person, sim.frame, None])
+                was_inside[person] = inside
+            for (object_id, col) in system.tracker.matches.items():
+                person = system.sources[col]
+                if person == FALSE_POSITIVE:
+                    continue
+                if last_track.get(person, object_id) != object_id:
+                    switches += 1
+                last_track[person] = object_id
+                tracks_per_person.setdefault(person, set()).add(object_id)
+
+    on_time, late, duplicate, false_alerts, delays = 0, 0, 0, 0, []
+    for (alert_frame, _, person) in system.alerts:
+        candidates = [e for e in entries if e[0] == person and -early_frames <= alert_frame - e[1] <= match_frames]
+        if not candidates:
+            false_alerts += 1
+            continue
+        entry = max(candidates, key=lambda e: e[1])   # the most recent entry of that person
+        if entry[2] is not None:
+            duplicate += 1
+            continue
+        entry[2] = alert_frame
+        delay = alert_frame - entry[1]
+        delays.append(delay * sim.dt)
+        if delay <= late_frames:
+            on_time += 1
+        else:
+            late += 1
+
+    return {
+        "people": sim.spawned,
+        "frames": sim.frame,
+        "id switches": switches,
+        "tracks per person": float(np.mean([len(t) for t in tracks_per_person.values()])) if tracks_per_person else 0.0,
+        "entries": len(entries),
+        "on time": on_time,
+        "late": late,
+        "missed": sum(1 for e in entries if e[2] is None),
+        "duplicate alerts": duplicate,
+        "false alerts": false_alerts,
+        "mean delay s": float(np.mean(delays)) if delays else 0.0,
+        "p95 delay s": float(np.percentile(delays, 95)) if delays else 0.0,
+        "tracker ms/frame": float(np.mean(track_times) * 1000),
+        "pipeline ms/frame": float(np.mean(frame_times) * 1000),
+        "pipeline p99 ms": float(np.percentile(frame_times, 99) * 1000),
+    }
+
+
+def default_polygon(width, height):
+    return [(int(width * 0.3), int(height * 0.45)), (int(width * 0.7), int(height * 0.45)),
+            (int(width * 0.75), int(height * 0.9)), (int(width * 0.25), int(height * 0.9))]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tracker and alert accuracy/speed against simulated ground truth")
+    parser.add_argument("--people", type=int, default=2000, help="Ground-truth trajectories to simulate")
+    parser.add_argument("--concurrent", type=int, default=12, help="Most people in the scene at once")
+    parser.add_argument("--fps", type=float, default=10.0, help="Analyzed frames per second")
+    parser.add_argument("--noise", type=float, default=3.0, help="Detection box jitter (px, std dev)")
+    parser.add_argument("--miss", type=float, default=0.05, help="Missed-detection probability")
+    parser.add_argument("--false-positives", type=float, default=0.02, help="New false detections per frame")
+    parser.add_argument("--max-disappeared", type=int, default=30, help="Tracker: frames a track may coast")
+    parser.add_argument("--max-distance", type=float, default=150, help="Tracker: association gate (px)")
+    parser.add_argument("--late-s", type=float, default=1.0, help="Alerts later than this after entry are late")
+    parser.add_argument("--match-s", type=float, default=10.0, help="Alerts later than this are not matched")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    (w, h) = FRAME_SIZE
+    sim = GroundTruthSimulator(w, h, default_polygon(w, h), people=args.people, max_concurrent=args.concurrent,
+                               fps=args.fps, seed=args.seed, noise=args.noise, miss=args.miss,
+                               false_positives=args.false_positives)
+    with tempfile.TemporaryDirectory() as workdir:
+        system = EvalSystem(sim, workdir, args.max_disappeared, args.max_distance)
+        system.polygon = default_polygon(w, h)
+        print(f"[INFO] Simulating {args.people} people at {args.fps:g} fps "
+              f"(noise {args.noise:g}px, miss {args.miss:.0%}, {args.false_positives:g} FP/frame)")
+        start = time.perf_counter()
+        fps = args.fps
+        report = evaluate(system, math.ceil(args.late_s * fps), math.ceil(args.match_s * fps), math.ceil(0.5 * fps))
+        elapsed = time.perf_counter() - start
+        system.snapshots.close()
+
+    for (key, value) in report.items():
+        print(f"  {key:<20}{value:.3f}" if isinstance(value, float) else f"  {key:<20}{value}")
+    entries = max(report["entries"], 1)
+    print(f"[INFO] Recall {(report['on time'] + report['late']) / entries:.1%} "
+          f"({report['on time'] / entries:.1%} on time), {report['false alerts']} false, "
+          f"{report['id switches']} ID switches; {report['frames']} frames in {elapsed:.1f}s")
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Compact on-disk store of every track's path, with time and region queries.
+
+Points (track ID, time, anchor x/y, box, INSIDE/OUTSIDE) are buffered in
+memory and written as blocks to one file per camera per hour (UTC), e.g.
+trajectories/cam0/20261018_21.traj. A block is a small fixed header
+followed by a zlib-compressed columnar payload:
+
+    header  magic, count, t_min, t_max, 8x8 grid bitmask, frame w/h, payload size
+    payload track IDs (uint32) | time deltas in ms (uint16) | x, y (int16)
+            | boxes (4 x int16) | state (uint8)
+
+The hour in the file name is the time index and the grid bitmask (which of
+8x8 frame cells the block's points fall in) is the spatial index, so a
+query reads only the headers of the hours it covers and decompresses only
+blocks that can match.
+
+    python trajectory_store.py --camera cam0 --start "2026-10-18 20:00" \
+        --end "2026-10-19 06:00" --region 100,100,400,300
+"""
+
+import argparse
+import os
+import struct
+import time
+import zlib
+import numpy as np
+
+HEADER = struct.Struct("<4sIddQHHI")
+MAGIC = b"TRJ1"
+GRID = 8
+STATES = ("OUTSIDE", "INSIDE")
+MAX_DELTA_MS = 65535
+
+
+def bucket_name(t):
+    return time.strftime("%Y%m%d_%H", time.gmtime(t)) + ".traj"
+
+
+def grid_mask(xs, ys, w, h):
+    """Bitmask of the 8x8 frame cells containing the points (x, y)."""
+    cx = np.clip(np.asarray(xs, np.int64) * GRID // max(w, 1), 0, GRID - 1)
+    cy = np.clip(np.asarray(ys, np.int64) * GRID // max(h, 1), 0, GRID - 1)
+    mask = 0
+    for bit in np.unique(cy * GRID + cx):
+        mask |= 1 << int(bit)
+    return mask
+
+
+def region_mask(region, w, h):
+    (x1, y1, x2, y2) = region
+    cells = [(cx, cy) for cy in range(GRID) for cx in range(GRID)
+             if cx * w / GRID <= x2 and (cx + 1) * w / GRID >= x1
+             and cy * h / GRID <= y2 and (cy + 1) * h / GRID >= y1]
+    return sum(1 << (cy * GRID + cx) for (cx, cy) in cells)
+
+
+class TrajectoryStore:
+    def __init__(self, root="trajectories", camera_id="cam0", block_records=4096, flush_seconds=10.0):
+        self.dir = os.path.join(root, camera_id)
+        os.makedirs(self.dir, exist_ok=True)
+        self.block_records = block_records
+        self.flush_seconds = flush_seconds
+        self.frame_size = (0, 0)   # (w, h), set by the caller before appending
+        self.buffer = []           # (t, id, x, y, x1, y1, x2, y2, state)
+        self.last_flush = time.time()
+        self.blocks_written = 0
+
+    def append(self, t, object_id, point, box, state):
+        if self.buffer:
+            # A block covers one hour file, and time only moves forward in small steps
+            (t_first, t_last) = (self.buffer[0][0], self.buffer[-1][0])
+            if bucket_name(t) != bucket_name(t_first) or not 0 <= (t - t_last) * 1000 < MAX_DELTA_MS:
+                self.flush()
+        self.buffer.append((t, int(object_id), int(point[0]), int(point[1]),
+                            *(int(v) for v in box), 1 if state == "INSIDE" else 0))
+        if len(self.buffer) >= self.block_records or time.time() - self.last_flush >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        self.last_flush = time.time()
+        if not self.buffer:
+            return
+        rows = self.buffer
+        self.buffer = []
+        t = np.array([r[0] for r in rows])
+        cols = np.array([r[1:] for r in rows], np.int64)
+        dt = np.diff(np.round(t * 1000).astype(np.int64), prepend=int(round(t[0] * 1000)))
+        payload = b"".join([
+            cols[:, 0].astype(np.uint32).tobytes(),
+            dt.astype(np.uint16).tobytes(),
+            np.clip(cols[:, 1:7], -32768, 32767).astype(np.int16).tobytes(),
+            cols[:, 7].astype(np.uint8).tobytes(),
+        ])
+        payload = zlib.compress(payload, 1)
+        (w, h) = self.frame_size
+        header = HEADER.pack(MAGIC, len(rows), t[0], t[-1], grid_mask(cols[:, 1], cols[:, 2], w, h),
+                             w, h, len(payload))
+        with open(os.path.join(self.dir, bucket_name(t[0])), "ab") as f:
+            f.write(header + payload)
+        self.blocks_written += 1
+
+    def close(self):
+        self.flush()
+
+
+def read_blocks(path, start, end, region=None):
+    """Yield decoded blocks of one hour file that overlap [start, end] and the region."""
+    with open(path, "rb") as f:
+        while True:
+            raw = f.read(HEADER.size)
+            if len(raw) < HEADER.size:
+                return
+            (magic, n, t_min, t_max, mask, w, h, size) = HEADER.unpack(raw)
+            if magic != MAGIC:
+                return   # torn write at the end of the file
+            if t_max < start or t_min > end or (region is not None and not mask & region_mask(region, w, h)):
+                f.seek(size, os.SEEK_CUR)
+                continue
+            data = f.read(size)
+            if len(data) < size:
+                return
+            data = zlib.decompress(data)
+            ids = np.frombuffer(data, np.uint32, n, 0)
+            dt = np.frombuffer(data, np.uint16, n, 4 * n)
+            coords = np.frombuffer(data, np.int16, 6 * n, 6 * n).reshape(n, 6)
+            states = np.frombuffer(data, np.uint8, n, 18 * n)
+            t = t_min + np.cumsum(dt.astype(np.int64)) / 1000.0
+            yield ids, t, coords, states
+
+
+def hour_files(root, camera_id, start, end):
+    hour = int(start // 3600) * 3600
+    while hour <= end:
+        path = os.path.join(root, camera_id, bucket_name(hour))
+        if os.path.exists(path):
+            yield path
+        hour += 3600
+
+
+def query(root, camera_id, start, end, region=None):
+    """
+    Points in [start, end] (epoch seconds), optionally only those inside
+    region = (x1, y1, x2, y2). Returns {track_id: [(t, x, y, box, state), ...]}.
+    """
+    tracks = {}
+    for path in hour_files(root, camera_id, start, end):
+        for (ids, t, coords, states) in read_blocks(path, start, end, region):
+            keep = (t >= start) & (t <= end)
+            if region is not None:
+                (x1, y1, x2, y2) = region
+                keep &= ((coords[:, 0] >= x1) & (coords[:, 0] <= x2)
+                         & (coords[:, 1] >= y1) & (coords[:, 1] <= y2))
+            for i in np.flatnonzero(keep):
+                tracks.setdefault(int(ids[i]), []).append(
+                    (float(t[i]), int(coords[i, 0]), int(coords[i, 1]),
+                     tuple(int(v) for v in coords[i, 2:]), STATES[states[i]]))
+    return tracks
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find tracks in the trajectory store")
+    parser.add_argument("--root", type=str, default="trajectories")
+    parser.add_argument("--camera", type=str, default="cam0")
+    parser.add_argument("--start", type=str, required=True, help="Local time, 'YYYY-mm-dd HH:MM'")
+    parser.add_argument("--end", type=str, required=True, help="Local time, 'YYYY-mm-dd HH:MM'")
+    parser.add_argument("--region", type=str, default="", help="x1,y1,x2,y2 in frame pixels")
+    args = parser.parse_args()
+
+    start = time.mktime(time.strptime(args.start, "%Y-%m-%d %H:%M"))
+    end = time.mktime(time.strptime(args.end, "%Y-%m-%d %H:%M"))
+    region = tuple(int(v) for v in args.region.split(",")) if args.region else None
+
+    t0 = time.perf_counter()
+    tracks = query(args.root, args.camera, start, end, region)
+    elapsed = time.perf_counter() - t0
+    for (object_id, points) in sorted(tracks.items(), key=lambda kv: kv[1][0][0]):
+        first = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(points[0][0]))
+        last = time.strftime("%H:%M:%S", time.localtime(points[-1][0]))
+        inside = any(p[4] == "INSIDE" for p in points)
+        print(f"Track {object_id}: {first} - {last}, {len(points)} points"
+              + (", was INSIDE" if inside else ""))
+    print(f"[INFO] {len(tracks)} tracks in {elapsed * 1000:.1f} ms")
@@ -0,0 +1,152 @@
+# video_reader.py
+"""
+Sequential video reader that only fully decodes the frames we analyze.
+
+VideoCapture.read() is grab() + retrieve(). Frames that will be skipped
+are only grab()bed, which demuxes and advances the stream without the
+colour conversion and copy into a BGR image; retrieve() is called only for
+analyzed frames. Recorded files can also be split into several segments
+and decoded in parallel.
+
+Each grab also records a timestamp: the position in the file for recorded
+video, the wall-clock time of the grab for live sources. dual_stream.py
+uses it to line up a camera's substream and main stream.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import time
+import cv2
+
+
+class StrideVideoReader:
+    def __init__(self, source, decode_size=None):
+        self.source = source
+        # source=None gives a closed reader (for pipelines fed without a capture)
+        self.vs = cv2.VideoCapture(source) if source is not None else cv2.VideoCapture()
+        self.frame_index = -1      # index of the last grabbed frame
+        self.decode_time = 0.0     # seconds spent in grab()/retrieve()/downscale
+        self.frames_grabbed = 0
+        self.frames_decoded = 0
+        self.timestamp = None      # seconds, see stream_time()
+        self.live = source is not None and self.vs.get(cv2.CAP_PROP_FRAME_COUNT) <= 0
+        self.decode_size = decode_size
+        self.native_resize = False
+        if decode_size is not None:
+            self.native_resize = self._request_size(decode_size)
+
+    def _request_size(self, size):
+        """Ask the backend to deliver frames at size (cameras usually can, files cannot)."""
+        (w, h) = size
+        self.vs.set(cv2.CAP_PROP_FRAME_WIDTH, w)
+        self.vs.set(cv2.CAP_PROP_FRAME_HEIGHT, h)
+        return (int(self.vs.get(cv2.CAP_PROP_FRAME_WIDTH)) == w
+                and int(self.vs.get(cv2.CAP_PROP_FRAME_HEIGHT)) == h)
+
+    def isOpened(self):
+        return self.vs.isOpened()
+
+    def get(self, prop):
+        return self.vs.get(prop)
+
+    def stream_time(self):
+        """Time of the last grabbed frame: file position, or wall clock for live sources."""
+        if self.live:
+            return time.time()
+        return self.vs.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+
+    def grab(self):
+        """Advance one frame without decoding it."""
+        start = time.perf_counter()
+        ok = self.vs.grab()
+        if ok:
+            self.frame_index += 1
+            self.frames_grabbed += 1
+            self.timestamp = self.stream_time()
+        self.decode_time += time.perf_counter() - start
+        return ok
+
+    def retrieve(self):
+        """Decode the last grabbed frame."""
+        start = time.perf_counter()
+        ok, frame = self.vs.retrieve()
+        if ok:
+            self.frames_decoded += 1
+        self.decode_time += time.perf_counter() - start
+        return ok, frame
+
+    def read(self, stride=1):
+        """
+        Advance `stride` frames and decode only the last one.
+        Returns (ok, frame); frame_index is the index of the returned frame.
+        """
+        start = time.perf_counter()
+        try:
+            for _ in range(max(1, stride)):
+                if not self.vs.grab():
+                    return False, None
+                self.frame_index += 1
+                self.frames_grabbed += 1
+            self.timestamp = self.stream_time()
+            ok, frame = self.vs.retrieve()
+            if not ok:
+                return False, None
+            self.frames_decoded += 1
+            if self.decode_size is not None and not self.native_resize:
+                frame = cv2.resize(frame, self.decode_size, interpolation=cv2.INTER_AREA)
+            return True, frame
+        finally:
+            self.decode_time += time.perf_counter() - start
+
+    def release(self):
+        self.vs.release()
+
+
+def _decode_segment(path, start, end, stride, decode_size, fn):
+    reader = StrideVideoReader(path, decode_size)
+    if start > 0:
+        # The backend decodes forward from the keyframe before `start`
+        reader.vs.set(cv2.CAP_PROP_POS_FRAMES, start)
+        reader.frame_index = start - 1
+    results = []
+    # First analyzed frame of this segment keeps the global stride grid
+    first = start + (-start) % stride
+    skip = first - start + 1
+    while reader.frame_index + skip < end:
+        ok, frame = reader.read(skip)
+        if not ok:
+            break
+        results.append((reader.frame_index, fn(reader.frame_index, frame)))
+        skip = stride
+    reader.release()
+    return results, reader.decode_time
+
+
+def decode_file_parallel(path, fn, stride=1, workers=4, decode_size=None, gop=0):
+    """
+    Decode a recorded file as `workers` segments in parallel, calling
+    fn(frame_index, frame) on every stride-th frame. Segment starts are
+    rounded down to multiples of `gop` (the keyframe interval, if known) so
+    each worker starts on a keyframe. Returns ([(index, result), ...] in
+    frame order, total decode seconds across workers).
+    """
+    vs = cv2.VideoCapture(path)
+    total = int(vs.get(cv2.CAP_PROP_FRAME_COUNT))
+    vs.release()
+    if total <= 0 or workers <= 1:
+        return _decode_segment(path, 0, total if total > 0 else float("inf"), stride, decode_size, fn)
+
+    bounds = [total * i // workers for i in range(workers)]
+    if gop > 0:
+        bounds = [b - b % gop for b in bounds]
+    bounds = sorted(set(bounds)) + [total]
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_decode_segment, path, bounds[i], bounds[i + 1], stride, decode_size, fn)
+                   for i in range(len(bounds) - 1)]
+        parts = [f.result() for f in futures]
+
+    results, decode_time = [], 0.0
+    for (segment, seconds) in parts:
+        results.extend(segment)
+        decode_time += seconds
+    return results, decode_time
@@ -0,0 +1,135 @@
+# zone_config.py
+"""
+Zone configuration file with hot reload.
+
+Zones live in a JSON file instead of being drawn before every run:
+
+    {
+      "perimeter": [[100, 100], [500, 100], [500, 400], [100, 400]],
+      "tripwires": [{"name": "gate", "a": [300, 50], "b": [300, 450], "direction": "L->R"}]
+    }
+
+ZoneWatcher polls the file on a background thread. When it changes, the
+new geometry is validated and compiled (tripwire edge array and, once the
+frame size is known, an inside/outside mask) off the frame loop; the loop
+picks the result up with poll() between frames and swaps it in at once.
+A file that fails to parse is reported and the current zones stay active.
+"""
+
+import json
+import os
+import threading
+import cv2
+import numpy as np
+from tripwire import Tripwire, TripwireEngine
+
+
+class CompiledZones:
+    def __init__(self, polygon, tripwires, frame_size=None, source=None):
+        self.polygon = [tuple(p) for p in polygon]
+        self.tripwires = tripwires
+        self.engine = TripwireEngine(self.polygon, self.tripwires)
+        self.source = source
+        self.mask = None
+        if frame_size is not None:
+            # 1 inside (boundary included, like pointPolygonTest >= 0), 0 outside
+            self.mask = np.zeros(frame_size, np.uint8)
+            cv2.fillPoly(self.mask, [np.array(self.polygon, np.int32)], 1)
+            cv2.polylines(self.mask, [np.array(self.polygon, np.int32)], True, 1)
+
+
+def _point(value):
+    """(x, y) from a two-number [x, y] list, or None if it is not one."""
+    if not isinstance(value, (list, tuple)) or len(value) != 2:
+        return None
+    if not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in value):
+        return None
+    return (value[0], value[1])
+
+
+def load_zone_config(path):
+    """Returns (polygon, tripwires) from a zone file; raises ValueError if invalid."""
+    with open(path) as f:
+        try:
+            config = json.load(f)
+        except ValueError as e:
+            raise ValueError(f"{path}: {e}")
+
+    polygon = [tuple(int(v) for v in p) for p in config.get("perimeter", [])]
+    if len(polygon) < 3 or any(len(p) != 2 for p in polygon):
+        raise ValueError(f"{path}: perimeter needs at least 3 [x, y] points")
+
+    tripwires = []
+    for (i, wire) in enumerate(config.get("tripwires", [])):
+        if not isinstance(wire, dict):
+            raise ValueError(f"{path}: tripwire {i} must be an object")
+        direction = wire.get("direction", "both")
+        if direction not in ("both", "L->R", "R->L"):
+            raise ValueError(f"{path}: tripwire {i} has unknown direction {direction!r}")
+        (a, b) = (_point(wire.get("a")), _point(wire.get("b")))
+        if a is None or b is None:
+            raise ValueError(f"{path}: tripwire {i} needs \"a\" and \"b\" as [x, y] points")
+        tripwires.append(Tripwire(wire.get("name", f"tripwire{i}"), a, b, direction))
+    return polygon, tripwires
+
+
+def compile_zone_file(path, frame_size=None):
+    (polygon, tripwires) = load_zone_config(path)
+    return CompiledZones(polygon, tripwires, frame_size, source=path)
+
+
+class ZoneWatcher:
+    def __init__(self, path, interval=1.0):
+        self.path = path
+        self.interval = interval
+        self.frame_size = None
+        self.pending = None
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.mtime = None
+        self.thread = None
+        self.force = threading.Event()
+
+    def load_now(self):
+        """Load and compile synchronously (used for the initial zones)."""
+        self.mtime = os.path.getmtime(self.path)
+        return compile_zone_file(self.path, self.frame_size)
+
+    def start(self):
+        self.thread = threading.Thread(target=self._watch, name="zone-watcher", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def set_frame_size(self, frame_size):
+        """Recompile in the background so the next zones come with a mask for this size."""
+        if frame_size != self.frame_size:
+            self.frame_size = frame_size
+            self.force.set()
+
+    def poll(self):
+        """The newest compiled zones since the last poll, or None. Cheap; call once per frame."""
+        if self.pending is None:
+            return None
+        with self.lock:
+            (zones, self.pending) = (self.pending, None)
+        return zones
+
+    def _watch(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                continue
+            if mtime == self.mtime and not self.force.is_set():
+                continue
+            self.force.clear()
+            self.mtime = mtime
+            try:
+                zones = compile_zone_file(self.path, self.frame_size)
+            except (ValueError, KeyError, TypeError, IndexError, OSError) as e:
+                print(f"[WARN] Zone file not applied, keeping current zones: {e}")
+                continue
+            with self.lock:
+                self.pending = zones